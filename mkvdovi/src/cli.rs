@@ -161,6 +161,16 @@ pub struct Args {
     #[arg(long, value_enum, default_value_t = AnalysisQuality::Auto)]
     pub analysis_quality: AnalysisQuality,
 
+    /// Override the analyzer's downscale factor (1=full, 2=half, 4=quarter resolution).
+    /// By default it follows --analysis-quality, adapted to the source width.
+    #[arg(long, value_parser = clap::value_parser!(u32).range(1..))]
+    pub analyzer_downscale: Option<u32>,
+
+    /// Override the analyzer's frame sample rate (analyze every Nth frame).
+    /// By default it follows --analysis-quality.
+    #[arg(long, value_parser = clap::value_parser!(u32).range(1..))]
+    pub analyzer_sample_rate: Option<u32>,
+
     /// Keep the source file after successful conversion (by default it is deleted).
     #[arg(long)]
     pub keep_source: bool,
@@ -171,6 +181,11 @@ pub struct Args {
     #[arg(long)]
     pub no_resume: bool,
 
+    /// Do not read or write the persistent MediaInfo/ffprobe result cache; every source is
+    /// probed afresh (results are still shared within this run).
+    #[arg(long)]
+    pub no_probe_cache: bool,
+
     /// Warn when the current step's output file stops growing for this many seconds
     /// (0 disables). Helps tell a stalled tool apart from merely slow storage.
     #[arg(long, default_value_t = 300)]
@@ -185,6 +200,17 @@ pub struct Args {
     #[arg(long, value_enum, default_value_t = Encoder::Libx265)]
     pub encoder: Encoder,
 
+    /// Number of files to convert concurrently (default: 1).
+    /// Each conversion already runs multi-threaded tools, so values above a few mostly
+    /// trade CPU for disk contention.
+    #[arg(short = 'j', long, default_value_t = 1, value_parser = clap::value_parser!(u16).range(1..))]
+    pub jobs: u16,
+
+    /// Cap the threads used by ffmpeg re-encodes (HLG→PQ, FEL) and their x265 worker pool.
+    /// 0 (default) lets ffmpeg and x265 use every core.
+    #[arg(long, default_value_t = 0)]
+    pub ffmpeg_threads: u16,
+
     /// Verbose mode: show raw command output (useful for debugging).
     #[arg(short, long)]
     pub verbose: bool,
@@ -220,6 +246,26 @@ mod tests {
         assert_eq!(args.analysis_quality, AnalysisQuality::Balanced);
     }
 
+    #[test]
+    fn jobs_defaults_to_one_and_rejects_zero() {
+        let args = Args::try_parse_from(["mkvdovi"]).unwrap();
+        assert_eq!(args.jobs, 1);
+
+        let args = Args::try_parse_from(["mkvdovi", "-j", "3"]).unwrap();
+        assert_eq!(args.jobs, 3);
+
+        assert!(Args::try_parse_from(["mkvdovi", "--jobs", "0"]).is_err());
+    }
+
+    #[test]
+    fn ffmpeg_threads_defaults_to_auto() {
+        let args = Args::try_parse_from(["mkvdovi"]).unwrap();
+        assert_eq!(args.ffmpeg_threads, 0);
+
+        let args = Args::try_parse_from(["mkvdovi", "--ffmpeg-threads", "8"]).unwrap();
+        assert_eq!(args.ffmpeg_threads, 8);
+    }
+
     #[test]
     fn inspect_subcommand_precedes_input_vec() {
         let args = Args::try_parse_from(["mkvdovi", "inspect", "movie.mkv"]).unwrap();
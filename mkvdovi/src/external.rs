@@ -1,78 +1,157 @@
 use anyhow::{Context, Result};
 use colored::Colorize;
+use std::collections::HashMap;
 use std::fs::File;
-use std::io::{BufReader, Read, Write};
+use std::io::{Read, Write};
 use std::path::{Path, PathBuf};
 use std::process::{Command, Stdio};
-use std::sync::mpsc;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{mpsc, Mutex, OnceLock};
 use std::thread;
 use std::time::{Duration, Instant};
 
 use crate::progress::{self, ByteProgress, Spinner};
 
 /// Find a specific tool on PATH.
+///
+/// The search runs in-process (no `which`/`where` spawn) and is memoized for the life of the
+/// process: PATH does not change mid-run, and a batch conversion asks several times per file.
 pub fn find_tool(tool_name: &str) -> Option<PathBuf> {
-    let locator = if cfg!(target_os = "windows") {
-        "where"
-    } else {
-        "which"
-    };
-    let output = Command::new(locator)
-        .arg(tool_name)
-        .stdout(Stdio::piped())
-        .stderr(Stdio::null())
-        .output()
-        .ok()?;
-
-    if !output.status.success() {
-        return None;
+    static CACHE: OnceLock<Mutex<HashMap<String, Option<PathBuf>>>> = OnceLock::new();
+    let cache = CACHE.get_or_init(|| Mutex::new(HashMap::new()));
+
+    if let Some(found) = cache.lock().unwrap().get(tool_name) {
+        return found.clone();
     }
+    let found = locate_tool(tool_name);
+    cache
+        .lock()
+        .unwrap()
+        .insert(tool_name.to_string(), found.clone());
+    found
+}
 
-    String::from_utf8(output.stdout)
-        .ok()?
-        .lines()
-        .map(str::trim)
-        .find(|line| !line.is_empty())
-        .map(PathBuf::from)
+/// Canonical (symlink-resolved) path of a PATH tool, or the bare name when it is not found.
+///
+/// dovi_tool is run from inside temp directories and handed to helper processes, so callers
+/// want a path that does not depend on the working directory. Memoized like `find_tool`.
+pub fn canonical_tool_path(tool_name: &str) -> PathBuf {
+    static CACHE: OnceLock<Mutex<HashMap<String, PathBuf>>> = OnceLock::new();
+    let cache = CACHE.get_or_init(|| Mutex::new(HashMap::new()));
+
+    if let Some(found) = cache.lock().unwrap().get(tool_name) {
+        return found.clone();
+    }
+    let path = find_tool(tool_name).unwrap_or_else(|| PathBuf::from(tool_name));
+    let path = std::fs::canonicalize(&path).unwrap_or(path);
+    cache
+        .lock()
+        .unwrap()
+        .insert(tool_name.to_string(), path.clone());
+    path
 }
 
-/// Run a command and log its output to a file.
-/// Returns true if success code.
-pub fn run_command(cmd: &mut Command, log_path: &Path) -> Result<bool> {
-    let log_file = File::create(log_path).context("Failed to create log file")?;
-    let mut writer = std::io::BufWriter::new(log_file);
+/// A `Command` for a PATH tool, spawned by its resolved absolute path.
+///
+/// Uses the memoized `find_tool` lookup, so repeated probes (mediainfo, ffprobe, ffmpeg) skip
+/// the per-spawn PATH search; falls back to the bare name when the tool is not found so the
+/// spawn error stays the familiar one.
+pub fn tool_command(tool_name: &str) -> Command {
+    match find_tool(tool_name) {
+        Some(path) => Command::new(path),
+        None => Command::new(tool_name),
+    }
+}
 
-    // Write command line for debugging
-    writeln!(writer, "Running command: {:?}", cmd)?;
-    writer.flush()?;
+fn locate_tool(tool_name: &str) -> Option<PathBuf> {
+    let path_var = std::env::var_os("PATH")?;
+    std::env::split_paths(&path_var)
+        .filter(|dir| !dir.as_os_str().is_empty())
+        .find_map(|dir| executable_in(&dir, tool_name))
+}
 
-    // Redirect stderr to stdout to capture everything
-    cmd.stdout(Stdio::piped());
-    cmd.stderr(Stdio::piped());
+/// The executable for `tool_name` inside `dir`, if any (honouring PATHEXT on Windows).
+#[cfg(windows)]
+fn executable_in(dir: &Path, tool_name: &str) -> Option<PathBuf> {
+    let exts = std::env::var("PATHEXT").unwrap_or_else(|_| ".COM;.EXE;.BAT;.CMD".to_string());
+    std::iter::once(String::new())
+        .chain(exts.split(';').map(str::to_string))
+        .map(|ext| dir.join(format!("{}{}", tool_name, ext)))
+        .find(|candidate| candidate.is_file())
+}
+
+#[cfg(not(windows))]
+fn executable_in(dir: &Path, tool_name: &str) -> Option<PathBuf> {
+    use std::os::unix::fs::PermissionsExt;
+    let candidate = dir.join(tool_name);
+    let meta = std::fs::metadata(&candidate).ok()?;
+    (meta.is_file() && meta.permissions().mode() & 0o111 != 0).then_some(candidate)
+}
 
-    // Actually, std::process::Command doesn't support "stderr -> stdout" fd redirection easily without shell.
-    // Better to pipe both.
+/// Run a command, capturing its output in memory.
+/// Returns true if success code.
+///
+/// The log file is only written when it is useful — on failure, or always with `--verbose` —
+/// so the many short tool runs in a batch do not each create, write and close a log.
+pub fn run_command(cmd: &mut Command, log_path: &Path) -> Result<bool> {
     cmd.stdout(Stdio::piped());
     cmd.stderr(Stdio::piped());
 
-    let mut child = cmd.spawn().context("Failed to spawn command")?;
+    // `output()` drains both pipes concurrently, so a chatty tool cannot block on a full pipe.
+    let output = cmd.output().context("Failed to spawn command")?;
 
-    let _stdout = child.stdout.take().expect("Failed to open stdout");
-    let _stderr = child.stderr.take().expect("Failed to open stderr");
+    if !output.status.success() || progress::is_verbose() {
+        write_command_log(log_path, cmd, &output.stdout, &output.stderr)?;
+    }
 
-    // We want to stream both to the log file.
-    // We can use threads to drive this.
+    Ok(output.status.success())
+}
 
-    // Simplification: For non-live commands, just wait_with_output is easier,
-    // but we want to log it potentially.
-    // Let's use wait_with_output for simple commands and dump to file.
+/// Write a command line and its captured stdout/stderr to `log_path`.
+fn write_command_log(log_path: &Path, cmd: &Command, stdout: &[u8], stderr: &[u8]) -> Result<()> {
+    let log_file = File::create(log_path).context("Failed to create log file")?;
+    let mut writer = std::io::BufWriter::new(log_file);
 
-    let output = child.wait_with_output()?;
+    // Write command line for debugging
+    writeln!(writer, "Running command: {:?}", cmd)?;
+    writer.write_all(stdout)?;
+    writer.write_all(stderr)?;
+    writer.flush()?;
+    Ok(())
+}
 
-    writer.write_all(&output.stdout)?;
-    writer.write_all(&output.stderr)?;
+/// Read size for the pipe-draining threads. Tools such as ffmpeg and x265 can write tens of
+/// megabytes of progress output; one large read per wakeup keeps the syscall count low.
+const PIPE_CHUNK: usize = 64 * 1024;
 
-    Ok(output.status.success())
+/// Append a chunk of captured output to a command log, turning carriage returns into
+/// newlines so progress redraws stay readable. `\r` is ASCII, so this is safe on raw
+/// (possibly partial UTF-8) chunks.
+fn write_log_chunk(log: &mut impl Write, data: &[u8]) -> std::io::Result<()> {
+    if !data.contains(&b'\r') {
+        return log.write_all(data);
+    }
+    let cleaned: Vec<u8> = data
+        .iter()
+        .map(|&b| if b == b'\r' { b'\n' } else { b })
+        .collect();
+    log.write_all(&cleaned)
+}
+
+/// The last non-empty line of a command log, read from its final few KiB only.
+fn last_log_line(log_path: &Path) -> Option<String> {
+    use std::io::{Seek, SeekFrom};
+    const TAIL: u64 = 4096;
+    let mut file = File::open(log_path).ok()?;
+    let len = file.metadata().ok()?.len();
+    file.seek(SeekFrom::Start(len.saturating_sub(TAIL))).ok()?;
+    let mut tail = Vec::new();
+    file.read_to_end(&mut tail).ok()?;
+    String::from_utf8_lossy(&tail)
+        .split(['\r', '\n'])
+        .map(str::trim)
+        .rfind(|line| !line.is_empty())
+        .map(str::to_string)
 }
 
 /// Run a command with a spinner, logging output to a file.
@@ -91,34 +170,28 @@ pub fn run_command_with_spinner(cmd: &mut Command, log_path: &Path, message: &st
         return Ok(result);
     }
 
-    let log_file = File::create(log_path).context("Failed to create log file")?;
-    let mut writer = std::io::BufWriter::new(log_file);
+    let mut log_file = File::create(log_path).context("Failed to create log file")?;
 
     // Write command line for debugging
-    writeln!(writer, "Running command: {:?}", cmd)?;
-    writer.flush()?;
-
-    cmd.stdout(Stdio::piped());
-    cmd.stderr(Stdio::piped());
+    writeln!(log_file, "Running command: {:?}", cmd)?;
 
-    let mut child = cmd.spawn().context("Failed to spawn command")?;
+    // Hand the log file itself to the child as stdout and stderr: the kernel appends its
+    // output straight to disk, so a chatty tool can never stall on a full pipe and nothing
+    // is held in memory. Both handles share the file offset, after the header line.
+    cmd.stdout(Stdio::from(
+        log_file.try_clone().context("Failed to clone log file")?,
+    ));
+    cmd.stderr(Stdio::from(log_file));
 
-    let _stdout = child.stdout.take().expect("Failed to open stdout");
-    let _stderr = child.stderr.take().expect("Failed to open stderr");
+    let status = cmd.status().context("Failed to spawn command")?;
 
-    let output = child.wait_with_output()?;
-
-    writer.write_all(&output.stdout)?;
-    writer.write_all(&output.stderr)?;
-
-    if output.status.success() {
+    if status.success() {
         spinner.finish_success();
         Ok(true)
     } else {
-        // Try to extract error from output
-        let stderr_str = String::from_utf8_lossy(&output.stderr);
-        let err_hint = stderr_str.lines().last().unwrap_or("check log for details");
-        spinner.finish_error(Some(err_hint));
+        // Surface the tool's last words as the error hint
+        let hint = last_log_line(log_path);
+        spinner.finish_error(Some(hint.as_deref().unwrap_or("check log for details")));
         Ok(false)
     }
 }
@@ -139,6 +212,35 @@ pub fn run_command_with_progress(
     expected_total: Option<u64>,
     stall_secs: u64,
 ) -> Result<bool> {
+    run_command_with_progress_cancellable(
+        cmd,
+        log_path,
+        message,
+        output_path,
+        expected_total,
+        stall_secs,
+        None,
+    )
+}
+
+/// `run_command_with_progress` that kills the child and reports failure once `cancel` is
+/// set, checked at every progress poll. Lets a step running beside another one stop early
+/// when its result is no longer needed. In verbose mode (live output) only a flag that is
+/// already set is honoured.
+pub fn run_command_with_progress_cancellable(
+    cmd: &mut Command,
+    log_path: &Path,
+    message: &str,
+    output_path: &Path,
+    expected_total: Option<u64>,
+    stall_secs: u64,
+    cancel: Option<&AtomicBool>,
+) -> Result<bool> {
+    let cancelled = || cancel.is_some_and(|flag| flag.load(Ordering::SeqCst));
+    if cancelled() {
+        return Ok(false);
+    }
+
     // Verbose mode: stream raw output to the terminal instead of drawing a bar.
     if progress::is_verbose() {
         let bar = ByteProgress::new(message, expected_total);
@@ -168,8 +270,8 @@ pub fn run_command_with_progress(
     let (tx, rx) = mpsc::channel::<Vec<u8>>();
     let tx_err = tx.clone();
     let t_out = thread::spawn(move || {
-        let mut reader = BufReader::new(stdout);
-        let mut buf = [0u8; 4096];
+        let mut reader = stdout;
+        let mut buf = vec![0u8; PIPE_CHUNK];
         while let Ok(n) = reader.read(&mut buf) {
             if n == 0 {
                 break;
@@ -178,8 +280,8 @@ pub fn run_command_with_progress(
         }
     });
     let t_err = thread::spawn(move || {
-        let mut reader = BufReader::new(stderr);
-        let mut buf = [0u8; 4096];
+        let mut reader = stderr;
+        let mut buf = vec![0u8; PIPE_CHUNK];
         while let Ok(n) = reader.read(&mut buf) {
             if n == 0 {
                 break;
@@ -189,8 +291,7 @@ pub fn run_command_with_progress(
     });
     let t_log = thread::spawn(move || {
         for data in rx {
-            let s = String::from_utf8_lossy(&data);
-            let _ = log_writer.write_all(s.replace('\r', "\n").as_bytes());
+            let _ = write_log_chunk(&mut log_writer, &data);
         }
         let _ = log_writer.flush();
     });
@@ -221,6 +322,10 @@ pub fn run_command_with_progress(
         if let Some(status) = child.try_wait()? {
             break status;
         }
+        if cancelled() {
+            let _ = child.kill();
+            break child.wait()?;
+        }
         thread::sleep(poll);
     };
 
@@ -233,11 +338,15 @@ pub fn run_command_with_progress(
     let _ = t_err.join();
     let _ = t_log.join();
 
-    if status.success() {
+    if status.success() && !cancelled() {
         bar.finish_success();
         Ok(true)
+    } else if cancelled() {
+        bar.finish_error(Some("cancelled"));
+        Ok(false)
     } else {
-        bar.finish_error(Some("check log for details"));
+        let hint = last_log_line(log_path);
+        bar.finish_error(Some(hint.as_deref().unwrap_or("check log for details")));
         Ok(false)
     }
 }
@@ -266,12 +375,9 @@ pub fn run_command_live(cmd: &mut Command, log_path: &Path) -> Result<bool> {
     let tx_err = tx.clone();
 
     let t_out = thread::spawn(move || {
-        let reader = BufReader::new(stdout);
-        // We read byte by byte or chunk to preserve exact output (including \r)
-        // copy() might buffer too much?
-        // Let's just read chunks.
-        let mut reader = reader;
-        let mut binding = [0u8; 1024];
+        // Read raw chunks to preserve exact output (including \r).
+        let mut reader = stdout;
+        let mut binding = vec![0u8; PIPE_CHUNK];
         while let Ok(n) = reader.read(&mut binding) {
             if n == 0 {
                 break;
@@ -281,9 +387,8 @@ pub fn run_command_live(cmd: &mut Command, log_path: &Path) -> Result<bool> {
     });
 
     let t_err = thread::spawn(move || {
-        let reader = BufReader::new(stderr);
-        let mut reader = reader;
-        let mut binding = [0u8; 1024];
+        let mut reader = stderr;
+        let mut binding = vec![0u8; PIPE_CHUNK];
         while let Ok(n) = reader.read(&mut binding) {
             if n == 0 {
                 break;
@@ -292,19 +397,21 @@ pub fn run_command_live(cmd: &mut Command, log_path: &Path) -> Result<bool> {
         }
     });
 
-    // Main loop: receive from channel, write to log + screen
+    // The log gets its own writer thread so a slow disk never delays terminal updates.
+    let (log_tx, log_rx) = mpsc::channel::<Vec<u8>>();
+    let t_log = thread::spawn(move || {
+        for data in log_rx {
+            // Replace \r with \n for readability in logs, as python did
+            let _ = write_log_chunk(&mut log_writer, &data);
+        }
+        let _ = log_writer.flush();
+    });
+
+    // Main loop: receive from channel, write to screen, then hand off to the log
     let mut stdout_handle = std::io::stdout();
     let mut stderr_handle = std::io::stderr();
 
     for (is_err, data) in rx {
-        // Write to log (replacing \r with \n for readability in logs, as python did)
-        // Python: chunk.decode(...).replace('\r', '\n')
-        // We'll just write raw bytes to log? Or try sanitize.
-        // Valid utf8 is safer for replacing strings.
-        let s = String::from_utf8_lossy(&data);
-        let clean_s = s.replace('\r', "\n");
-        let _ = log_writer.write_all(clean_s.as_bytes());
-
         // Write to terminal (raw)
         if is_err {
             let _ = stderr_handle.write_all(&data);
@@ -313,11 +420,14 @@ pub fn run_command_live(cmd: &mut Command, log_path: &Path) -> Result<bool> {
             let _ = stdout_handle.write_all(&data);
             let _ = stdout_handle.flush();
         }
+        let _ = log_tx.send(data);
     }
 
     // Close up
+    drop(log_tx);
     let _ = t_out.join();
     let _ = t_err.join();
+    let _ = t_log.join();
 
     let status = child.wait()?;
     Ok(status.success())
@@ -358,14 +468,21 @@ pub fn check_dependencies() -> Result<()> {
 
 /// Run a command and capture its stdout as a string.
 pub fn get_command_output(cmd: &mut Command) -> Result<String> {
+    let stdout = get_command_output_bytes(cmd)?;
+    String::from_utf8(stdout).context("Command output is not valid UTF-8")
+}
+
+/// Like `get_command_output`, but returns stdout as raw bytes. JSON probes parse these
+/// directly (`serde_json::from_slice`), skipping a separate UTF-8 validation pass over
+/// output that can run to megabytes.
+pub fn get_command_output_bytes(cmd: &mut Command) -> Result<Vec<u8>> {
     cmd.stdout(Stdio::piped());
     cmd.stderr(Stdio::null()); // Silence stderr for data fetching commands usually
 
     let output = cmd.output().context("Failed to execute command")?;
 
     if output.status.success() {
-        let s = String::from_utf8(output.stdout).context("Command output is not valid UTF-8")?;
-        Ok(s)
+        Ok(output.stdout)
     } else {
         anyhow::bail!("Command failed with status: {}", output.status)
     }
@@ -387,13 +504,54 @@ pub fn detect_nvidia_gpu() -> bool {
 }
 
 /// Check whether the ffmpeg on PATH provides a given encoder (e.g. "hevc_nvenc").
+///
+/// The encoder list is fetched once per process; every HLG/FEL re-encode in a batch asks.
 pub fn ffmpeg_has_encoder(name: &str) -> bool {
-    get_command_output(Command::new("ffmpeg").args(["-hide_banner", "-encoders"]))
-        .map(|out| {
-            out.lines()
-                .any(|line| line.split_whitespace().nth(1) == Some(name))
+    static ENCODERS: OnceLock<Vec<String>> = OnceLock::new();
+    ENCODERS
+        .get_or_init(|| {
+            get_command_output(tool_command("ffmpeg").args(["-hide_banner", "-encoders"]))
+                .map(|out| {
+                    out.lines()
+                        .filter_map(|line| line.split_whitespace().nth(1))
+                        .map(str::to_string)
+                        .collect()
+                })
+                .unwrap_or_default()
         })
-        .unwrap_or(false)
+        .iter()
+        .any(|encoder| encoder == name)
+}
+
+/// ffmpeg's stats flag for commands driven by `run_command_with_progress`. The bar is fed
+/// from the output file size, so outside `--verbose` the once-per-update `frame=… time=…`
+/// line would only be formatted, piped and rewritten into the log; verbose mode streams it
+/// to the terminal and keeps it.
+pub fn ffmpeg_stats_flag() -> &'static str {
+    if progress::is_verbose() {
+        "-stats"
+    } else {
+        "-nostats"
+    }
+}
+
+/// Append an explicit thread cap for an ffmpeg encode (`--ffmpeg-threads`); `0` leaves
+/// ffmpeg's own heuristics in charge. Must be called before the output path is added.
+pub fn apply_ffmpeg_threads(cmd: &mut Command, threads: u16) {
+    if threads > 0 {
+        let threads = threads.to_string();
+        cmd.args(["-threads", &threads, "-filter_threads", &threads]);
+    }
+}
+
+/// Extra `-x265-params` entries matching `--ffmpeg-threads`. x265 sizes its worker pool
+/// independently of ffmpeg's `-threads`, so the cap has to be passed as `pools=` too.
+pub fn x265_thread_params(threads: u16) -> String {
+    if threads > 0 {
+        format!(":pools={}", threads)
+    } else {
+        String::new()
+    }
 }
 
 /// Check whether an hdr_analyzer_mvp binary was built with the CUDA analysis
@@ -422,9 +580,8 @@ pub fn run_command_inherit_stderr(cmd: &mut Command, log_path: &Path) -> Result<
     let (tx, rx) = mpsc::channel();
 
     let t_out = thread::spawn(move || {
-        let reader = BufReader::new(stdout);
-        let mut reader = reader;
-        let mut binding = [0u8; 1024];
+        let mut reader = stdout;
+        let mut binding = vec![0u8; PIPE_CHUNK];
         while let Ok(n) = reader.read(&mut binding) {
             if n == 0 {
                 break;
@@ -437,9 +594,7 @@ pub fn run_command_inherit_stderr(cmd: &mut Command, log_path: &Path) -> Result<
 
     for data in rx {
         // Write to log
-        let s = String::from_utf8_lossy(&data);
-        let clean_s = s.replace('\r', "\n");
-        let _ = log_writer.write_all(clean_s.as_bytes());
+        let _ = write_log_chunk(&mut log_writer, &data);
 
         // Write to terminal
         let _ = stdout_handle.write_all(&data);
@@ -451,3 +606,67 @@ pub fn run_command_inherit_stderr(cmd: &mut Command, log_path: &Path) -> Result<
     let status = child.wait()?;
     Ok(status.success())
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[cfg(unix)]
+    #[test]
+    fn cancelled_progress_command_is_killed() {
+        let dir = tempfile::tempdir().unwrap();
+        let cancel = AtomicBool::new(false);
+        let started = Instant::now();
+        let ok = thread::scope(|scope| {
+            scope.spawn(|| {
+                thread::sleep(Duration::from_millis(200));
+                cancel.store(true, Ordering::SeqCst);
+            });
+            run_command_with_progress_cancellable(
+                Command::new("sleep").arg("30"),
+                &dir.path().join("sleep.log"),
+                "Sleeping",
+                &dir.path().join("out"),
+                None,
+                0,
+                Some(&cancel),
+            )
+            .unwrap()
+        });
+        assert!(!ok);
+        assert!(started.elapsed() < Duration::from_secs(10));
+    }
+
+    #[test]
+    fn last_log_line_skips_trailing_blank_and_carriage_return_lines() {
+        let dir = tempfile::tempdir().unwrap();
+        let log = dir.path().join("step.log");
+        std::fs::write(
+            &log,
+            "Running command: x\nProgress: 10%\rError: bad input\n\n",
+        )
+        .unwrap();
+        assert_eq!(last_log_line(&log).as_deref(), Some("Error: bad input"));
+
+        let long = format!("{}\nfinal line", "x".repeat(10_000));
+        std::fs::write(&log, long).unwrap();
+        assert_eq!(last_log_line(&log).as_deref(), Some("final line"));
+        assert_eq!(last_log_line(&dir.path().join("missing.log")), None);
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn executable_in_requires_an_executable_file() {
+        use std::os::unix::fs::PermissionsExt;
+        let dir = tempfile::tempdir().unwrap();
+        let tool = dir.path().join("sometool");
+        std::fs::write(&tool, b"#!/bin/sh\n").unwrap();
+
+        std::fs::set_permissions(&tool, std::fs::Permissions::from_mode(0o644)).unwrap();
+        assert_eq!(executable_in(dir.path(), "sometool"), None);
+
+        std::fs::set_permissions(&tool, std::fs::Permissions::from_mode(0o755)).unwrap();
+        assert_eq!(executable_in(dir.path(), "sometool"), Some(tool));
+        assert_eq!(executable_in(dir.path(), "missing"), None);
+    }
+}
@@ -11,6 +11,7 @@ use std::fs;
 use std::io::{Read, Write};
 use std::path::{Path, PathBuf};
 use std::process::{Child, Command, Stdio};
+use std::sync::OnceLock;
 
 use anyhow::{bail, Context, Result};
 use colored::Colorize;
@@ -99,9 +100,7 @@ struct FrameParams {
 pub fn detect_profile7_fel(input_file: &str, temp_dir: &Path) -> Result<Option<FelInfo>> {
     // Extract RPU to analyze
     let rpu_path = temp_dir.join("detect_rpu.bin");
-    let dovi_tool_path =
-        external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-    let dovi_abs = fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path);
+    let dovi_abs = external::canonical_tool_path("dovi_tool");
 
     // Extract RPU (limit to 1 frame for quick detection)
     let mut cmd = Command::new(&dovi_abs);
@@ -162,7 +161,8 @@ pub fn detect_profile7_fel(input_file: &str, temp_dir: &Path) -> Result<Option<F
 /// Main FEL conversion pipeline: demux → composite → re-encode → return path to composited HEVC
 pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> Result<PathBuf> {
     println!(
-        "{}",
+        "{}{}",
+        progress::file_tag(),
         "Profile 7 FEL detected! Starting BL+EL compositing pipeline..."
             .cyan()
             .bold()
@@ -202,7 +202,11 @@ pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> R
     )?;
 
     // Step 3: Probe properties needed for streaming encode
-    println!("{}", "Step 3/5: Reading source video properties...".green());
+    println!(
+        "{}{}",
+        progress::file_tag(),
+        "Step 3/5: Reading source video properties...".green()
+    );
     let (width, height) = get_hevc_dimensions(&bl_hevc)?;
     let (_, _, fps_num, fps_den) = get_video_properties(input_file)?;
 
@@ -211,7 +215,8 @@ pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> R
         FelEncoder::Modal => {
             // Upload BL+EL+RPU to Modal for composite + encode (no FFV1 intermediate)
             println!(
-                "{}",
+                "{}{}",
+                progress::file_tag(),
                 "Step 4/5: Uploading BL+EL+RPU to Modal for composite + NVENC encode...".green()
             );
 
@@ -233,7 +238,8 @@ pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> R
             let _ = fs::remove_file(&el_hevc);
 
             println!(
-                "{}",
+                "{}{}",
+                progress::file_tag(),
                 "Step 5/5: Modal encode complete! Proceeding with DV RPU generation..."
                     .green()
                     .bold()
@@ -242,7 +248,8 @@ pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> R
         FelEncoder::Local => {
             // Original streaming encode path
             println!(
-                "{}",
+                "{}{}",
+                progress::file_tag(),
                 "Step 4/5: Compositing BL+EL via NLQ (streaming to encoder; this may take a while)..."
                     .green()
             );
@@ -298,7 +305,8 @@ pub fn convert_fel_to_hdr10(input_file: &str, temp_dir: &Path, args: &Args) -> R
             let _ = fs::remove_file(&el_hevc);
 
             println!(
-                "{}",
+                "{}{}",
+                progress::file_tag(),
                 "Step 5/5: FEL compositing complete! Proceeding with DV RPU generation..."
                     .green()
                     .bold()
@@ -377,12 +385,12 @@ fn extract_hevc_from_mkv(
         return Ok(());
     }
 
-    let mut cmd = Command::new("ffmpeg");
+    let mut cmd = external::tool_command("ffmpeg");
     cmd.args([
         "-hide_banner",
         "-loglevel",
         "error",
-        "-stats",
+        external::ffmpeg_stats_flag(),
         "-i",
         input,
         "-map",
@@ -427,9 +435,7 @@ fn demux_dual_layer(
         return Ok(());
     }
 
-    let dovi_tool_path =
-        external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-    let dovi_abs = fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path);
+    let dovi_abs = external::canonical_tool_path("dovi_tool");
 
     let mut cmd = Command::new(&dovi_abs);
     cmd.args([
@@ -501,11 +507,13 @@ fn composite_bl_el_nlq(
 
     eprintln!(
         "{}",
-        format!(
-            "  Compositing {} frames at {}x{} (BL 16-bit + EL 10-bit → 10-bit output)",
-            total_frames, width, height
+        progress::for_stderr(
+            format!(
+                "  Compositing {} frames at {}x{} (BL 16-bit + EL 10-bit → 10-bit output)",
+                total_frames, width, height
+            )
+            .cyan()
         )
-        .cyan()
     );
 
     // Frame sizes
@@ -521,7 +529,7 @@ fn composite_bl_el_nlq(
     let bl_log_file = fs::File::create(&bl_decode_log)
         .with_context(|| format!("Failed to create {}", bl_decode_log.display()))?;
 
-    let mut bl_proc = Command::new("ffmpeg")
+    let mut bl_proc = external::tool_command("ffmpeg")
         .args([
             "-hide_banner",
             "-loglevel",
@@ -547,7 +555,7 @@ fn composite_bl_el_nlq(
     let (el_width, el_height) = get_hevc_dimensions(el_hevc)?;
     let needs_scale = el_width != width || el_height != height;
 
-    let mut el_cmd = Command::new("ffmpeg");
+    let mut el_cmd = external::tool_command("ffmpeg");
     el_cmd.args([
         "-hide_banner",
         "-loglevel",
@@ -581,7 +589,7 @@ fn composite_bl_el_nlq(
     // Progress bar (stderr so stdout stays clean for piped rawvideo output)
     let pb = indicatif::ProgressBar::with_draw_target(
         Some(total_frames as u64),
-        indicatif::ProgressDrawTarget::stderr(),
+        progress::bar_draw_target(),
     );
     pb.set_style(
         indicatif::ProgressStyle::default_bar()
@@ -1072,7 +1080,7 @@ fn composite_plane(
 fn parse_rpu_params(rpu_bin: &Path, _temp_dir: &Path) -> Result<Vec<FrameParams>> {
     eprintln!(
         "{}",
-        "  Parsing RPU binary with dolby_vision crate...".cyan()
+        progress::for_stderr("  Parsing RPU binary with dolby_vision crate...".cyan())
     );
 
     let rpus = parse_rpu_file(rpu_bin).context("Failed to parse RPU binary file")?;
@@ -1080,16 +1088,18 @@ fn parse_rpu_params(rpu_bin: &Path, _temp_dir: &Path) -> Result<Vec<FrameParams>
 
     eprintln!(
         "{}",
-        format!(
-            "  Parsed {} RPU frames, extracting parameters...",
-            total_frames
+        progress::for_stderr(
+            format!(
+                "  Parsed {} RPU frames, extracting parameters...",
+                total_frames
+            )
+            .cyan()
         )
-        .cyan()
     );
 
     let pb = indicatif::ProgressBar::with_draw_target(
         Some(total_frames as u64),
-        indicatif::ProgressDrawTarget::stderr(),
+        progress::bar_draw_target(),
     );
     pb.set_style(
         indicatif::ProgressStyle::default_bar()
@@ -1309,23 +1319,27 @@ fn parse_rpu_params(rpu_bin: &Path, _temp_dir: &Path) -> Result<Vec<FrameParams>
         .count();
     eprintln!(
         "{}",
-        format!(
-            "  NLQ active: {}/{} frames ({}%)",
-            nlq_frames,
-            total_frames,
-            nlq_frames * 100 / total_frames.max(1)
+        progress::for_stderr(
+            format!(
+                "  NLQ active: {}/{} frames ({}%)",
+                nlq_frames,
+                total_frames,
+                nlq_frames * 100 / total_frames.max(1)
+            )
+            .cyan()
         )
-        .cyan()
     );
     eprintln!(
         "{}",
-        format!(
-            "  Reshaping active: {}/{} frames ({}%)",
-            reshaping_active_count,
-            total_frames,
-            reshaping_active_count * 100 / total_frames.max(1)
+        progress::for_stderr(
+            format!(
+                "  Reshaping active: {}/{} frames ({}%)",
+                reshaping_active_count,
+                total_frames,
+                reshaping_active_count * 100 / total_frames.max(1)
+            )
+            .cyan()
         )
-        .cyan()
     );
 
     Ok(all_params)
@@ -1444,7 +1458,8 @@ fn encode_via_modal(
         }
     };
     println!(
-        "{}",
+        "{}{}",
+        progress::file_tag(),
         format!(
             "  Modal composite: BL {} + EL {} → hevc_nvenc preset={} qp={}",
             fmt_size(bl_bytes),
@@ -1475,7 +1490,8 @@ fn encode_via_modal(
         .map(|m| m.len() / (1024 * 1024))
         .unwrap_or(0);
     println!(
-        "{}",
+        "{}{}",
+        progress::file_tag(),
         format!("  Modal encode output: {} MB", output_size).cyan()
     );
 
@@ -1507,7 +1523,7 @@ fn spawn_reencode_composited_from_stdin(
     let log_file = fs::File::create(&log_path)
         .with_context(|| format!("Failed to create {}", log_path.display()))?;
 
-    let mut cmd = Command::new("ffmpeg");
+    let mut cmd = external::tool_command("ffmpeg");
     cmd.args([
         "-hide_banner",
         "-loglevel",
@@ -1566,8 +1582,11 @@ fn spawn_reencode_composited_from_stdin(
             );
         }
         let x265_params = format!(
-            "colorprim=bt2020:transfer=smpte2084:colormatrix=bt2020nc:master-display={}:max-cll={},{}:hdr-opt=1:repeat-headers=1",
-            master_display, max_cll, max_fall
+            "colorprim=bt2020:transfer=smpte2084:colormatrix=bt2020nc:master-display={}:max-cll={},{}:hdr-opt=1:repeat-headers=1{}",
+            master_display,
+            max_cll,
+            max_fall,
+            external::x265_thread_params(args.ffmpeg_threads)
         );
 
         match args.encoder {
@@ -1619,6 +1638,7 @@ fn spawn_reencode_composited_from_stdin(
         }
     }
 
+    external::apply_ffmpeg_threads(&mut cmd, args.ffmpeg_threads);
     cmd.arg(output_mkv.to_str().unwrap());
     cmd.stdin(Stdio::piped());
     cmd.stdout(Stdio::null());
@@ -1631,24 +1651,29 @@ fn spawn_reencode_composited_from_stdin(
     Ok((child, log_path))
 }
 
+/// Whether ffmpeg's hevc_metadata bitstream filter can set mastering display / light level.
+/// Probed once per process: the answer cannot change mid-run.
 fn ffmpeg_supports_hevc_metadata_mastering_display() -> bool {
-    let mut cmd = Command::new("ffmpeg");
-    cmd.args(["-hide_banner", "-h", "bsf=hevc_metadata"]);
+    static SUPPORTED: OnceLock<bool> = OnceLock::new();
+    *SUPPORTED.get_or_init(|| {
+        let mut cmd = external::tool_command("ffmpeg");
+        cmd.args(["-hide_banner", "-h", "bsf=hevc_metadata"]);
 
-    let Ok(output) = cmd.output() else {
-        return false;
-    };
+        let Ok(output) = cmd.output() else {
+            return false;
+        };
 
-    let mut text = String::new();
-    text.push_str(&String::from_utf8_lossy(&output.stdout));
-    text.push_str(&String::from_utf8_lossy(&output.stderr));
+        let mut text = String::new();
+        text.push_str(&String::from_utf8_lossy(&output.stdout));
+        text.push_str(&String::from_utf8_lossy(&output.stderr));
 
-    text.contains("master_display") && text.contains("max_cll")
+        text.contains("master_display") && text.contains("max_cll")
+    })
 }
 
 /// Get video dimensions and framerate from input file
 fn get_video_properties(input_file: &str) -> Result<(u32, u32, u32, u32)> {
-    let mut cmd = Command::new("ffprobe");
+    let mut cmd = external::tool_command("ffprobe");
     cmd.args([
         "-v",
         "quiet",
@@ -1660,8 +1685,8 @@ fn get_video_properties(input_file: &str) -> Result<(u32, u32, u32, u32)> {
         input_file,
     ]);
 
-    let output = external::get_command_output(&mut cmd)?;
-    let json: serde_json::Value = serde_json::from_str(&output)?;
+    let output = external::get_command_output_bytes(&mut cmd)?;
+    let json: serde_json::Value = serde_json::from_slice(&output)?;
 
     let stream = json
         .get("streams")
@@ -1697,7 +1722,7 @@ fn get_video_properties(input_file: &str) -> Result<(u32, u32, u32, u32)> {
 
 /// Get HEVC stream dimensions
 fn get_hevc_dimensions(hevc_path: &Path) -> Result<(u32, u32)> {
-    let mut cmd = Command::new("ffprobe");
+    let mut cmd = external::tool_command("ffprobe");
     cmd.args([
         "-v",
         "quiet",
@@ -1709,8 +1734,8 @@ fn get_hevc_dimensions(hevc_path: &Path) -> Result<(u32, u32)> {
         hevc_path.to_str().unwrap(),
     ]);
 
-    let output = external::get_command_output(&mut cmd)?;
-    let json: serde_json::Value = serde_json::from_str(&output)?;
+    let output = external::get_command_output_bytes(&mut cmd)?;
+    let json: serde_json::Value = serde_json::from_slice(&output)?;
 
     let stream = json
         .get("streams")
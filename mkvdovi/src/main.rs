@@ -1,4 +1,8 @@
 use std::cmp::Ordering;
+use std::path::Path;
+use std::sync::atomic::{AtomicUsize, Ordering as AtomicOrdering};
+use std::sync::OnceLock;
+use std::thread;
 use std::time::Instant;
 
 use clap::Parser;
@@ -73,10 +77,17 @@ fn natural_segment_cmp(a: &str, b: &str) -> Ordering {
     ba.len().cmp(&bb.len())
 }
 
-fn episode_sort_key(path: &str, episode_re: &Regex) -> (u32, u32, String) {
+// The pattern is a compile-time constant, so it can only fail to build through a typo here.
+#[allow(clippy::expect_used)]
+fn episode_re() -> &'static Regex {
+    static EPISODE_RE: OnceLock<Regex> = OnceLock::new();
+    EPISODE_RE.get_or_init(|| Regex::new(r"s(\d{1,2})e(\d{1,3})").expect("valid episode regex"))
+}
+
+fn episode_sort_key(path: &str) -> (u32, u32) {
     let lower = path.to_lowercase();
 
-    if let Some(caps) = episode_re.captures(&lower) {
+    if let Some(caps) = episode_re().captures(&lower) {
         let season = caps
             .get(1)
             .and_then(|m| m.as_str().parse::<u32>().ok())
@@ -85,47 +96,42 @@ fn episode_sort_key(path: &str, episode_re: &Regex) -> (u32, u32, String) {
             .get(2)
             .and_then(|m| m.as_str().parse::<u32>().ok())
             .unwrap_or(u32::MAX);
-        return (season, episode, lower);
+        return (season, episode);
     }
 
-    (u32::MAX, u32::MAX, lower)
+    (u32::MAX, u32::MAX)
 }
 
 fn collect_default_inputs() -> anyhow::Result<Vec<String>> {
-    let mut files: Vec<String> = WalkDir::new(".")
+    // Temp directories are pruned rather than walked and filtered afterwards, and the
+    // extension test uses the entry's file name and cached file type, so no extra stat or
+    // per-component string conversion is spent on each entry.
+    let files: Vec<String> = WalkDir::new(".")
         .into_iter()
-        .filter_map(|e| e.ok())
-        .filter(|e| {
-            !e.path().components().any(|c| {
-                let name = c.as_os_str().to_string_lossy();
+        .filter_entry(|e| {
+            !(e.file_type().is_dir() && {
+                let name = e.file_name().to_string_lossy();
                 // Old prefix kept one release for pre-rename temp dirs.
                 name.starts_with("mkvdovi_temp_") || name.starts_with("mkvdolby_temp_")
             })
         })
+        .filter_map(|e| e.ok())
         .filter(|e| e.file_type().is_file() || e.file_type().is_symlink())
-        .map(|e| e.into_path())
-        .filter(|p| {
-            p.extension()
-                .map_or(false, |e| e.eq_ignore_ascii_case("mkv"))
+        .filter(|e| {
+            Path::new(e.file_name())
+                .extension()
+                .is_some_and(|ext| ext.eq_ignore_ascii_case("mkv"))
         })
-        .map(|p| p.to_string_lossy().to_string())
+        .map(|e| e.into_path().to_string_lossy().into_owned())
         .collect();
 
-    let episode_re = Regex::new(r"s(\d{1,2})e(\d{1,3})")
-        .map_err(|e| anyhow::anyhow!("Invalid episode regex: {}", e))?;
-
-    files.sort_by(|a, b| {
-        let ka = episode_sort_key(a, &episode_re);
-        let kb = episode_sort_key(b, &episode_re);
-
-        match ka.0.cmp(&kb.0) {
-            Ordering::Equal => match ka.1.cmp(&kb.1) {
-                Ordering::Equal => natural_segment_cmp(a, b),
-                ord => ord,
-            },
-            ord => ord,
-        }
-    });
+    // Episode keys are computed once per file rather than on every comparison.
+    let mut keyed: Vec<((u32, u32), String)> = files
+        .into_iter()
+        .map(|f| (episode_sort_key(&f), f))
+        .collect();
+    keyed.sort_by(|(ka, a), (kb, b)| ka.cmp(kb).then_with(|| natural_segment_cmp(a, b)));
+    let files = keyed.into_iter().map(|(_, f)| f).collect();
 
     Ok(files)
 }
@@ -148,6 +154,8 @@ fn main() -> anyhow::Result<()> {
     // Initialize progress module with verbosity settings
     progress::set_verbose(args.verbose);
     progress::set_quiet(args.quiet);
+    progress::init_color();
+    metadata::set_probe_disk_cache(!args.no_probe_cache);
 
     // Graceful interrupt: a dropped session (SIGHUP), SIGTERM, or Ctrl+C (SIGINT) prints a
     // resume hint and exits. The temp directory is only cleaned on a successful conversion, so
@@ -156,14 +164,20 @@ fn main() -> anyhow::Result<()> {
     let _ = ctrlc::set_handler(|| {
         eprintln!(
             "\n{}",
-            "Interrupted — partial work preserved in mkvdovi_temp_*; re-run to resume.".yellow()
+            progress::for_stderr(
+                "Interrupted — partial work preserved in mkvdovi_temp_*; re-run to resume."
+                    .yellow()
+            )
         );
         std::process::exit(130);
     });
 
     // Check dependencies after parsing so `--help`/`--version` work without tools installed.
     if let Err(e) = external::check_dependencies() {
-        eprintln!("{}", format!("Dependency check failed: {}", e).red());
+        eprintln!(
+            "{}",
+            progress::for_stderr(format!("Dependency check failed: {}", e).red())
+        );
         std::process::exit(1);
     }
 
@@ -177,8 +191,10 @@ fn main() -> anyhow::Result<()> {
                 if !progress::is_quiet() {
                     eprintln!(
                         "{}",
-                        "Boost mode enabled: using --peak-source=histogram99 for HDR10+ peak detection."
-                            .green()
+                        progress::for_stderr(
+                            "Boost mode enabled: using --peak-source=histogram99 for HDR10+ peak detection."
+                                .green()
+                        )
                     );
                 }
                 peak_source = cli::PeakSource::Histogram99;
@@ -211,7 +227,10 @@ fn main() -> anyhow::Result<()> {
     }
 
     if !progress::is_quiet() {
-        eprintln!("{} mkvdovi", "Starting".green().bold());
+        eprintln!(
+            "{} mkvdovi",
+            progress::for_stderr("Starting".green().bold())
+        );
     }
 
     // Process files
@@ -231,7 +250,10 @@ fn main() -> anyhow::Result<()> {
         .filter(|f| {
             if f.ends_with(".DV.mkv") && !final_args.mdfix {
                 if !progress::is_quiet() {
-                    eprintln!("{}", format!("Skipping already converted: {}", f).yellow());
+                    eprintln!(
+                        "{}",
+                        progress::for_stderr(format!("Skipping already converted: {}", f).yellow())
+                    );
                 }
                 skipped += 1;
                 false
@@ -252,36 +274,99 @@ fn main() -> anyhow::Result<()> {
     if total_files > 1 && !progress::is_quiet() {
         eprintln!(
             "{}",
-            format!("Queued {} file(s) for processing.", total_files).cyan()
+            progress::for_stderr(format!("Queued {} file(s) for processing.", total_files).cyan())
         );
     }
 
     let run_start = Instant::now();
-    let mut succeeded: usize = 0;
-    let mut failed: usize = 0;
+    let jobs = usize::from(final_args.jobs).min(total_files);
+    progress::set_parallel(jobs > 1);
+    let next_file = AtomicUsize::new(0);
+    let succeeded = AtomicUsize::new(0);
+    let failed = AtomicUsize::new(0);
 
-    for (idx, file) in actionable_files.iter().enumerate() {
-        if total_files > 1 && !progress::is_quiet() {
-            eprintln!(
-                "\n{}",
-                format!("── File {}/{} ──", idx + 1, total_files)
-                    .cyan()
-                    .dimmed()
-            );
+    if jobs > 1 && !progress::is_quiet() {
+        eprintln!(
+            "{}",
+            progress::for_stderr(format!("Converting up to {} files concurrently.", jobs).cyan())
+        );
+    }
+
+    // Workers pull the next queued file until the list is exhausted. Each file has its own
+    // temp directory, so conversions only share the (read-only) parsed arguments.
+    thread::scope(|scope| {
+        // Batch-probe the rest of the queue in the background. Files a worker has already
+        // claimed (and the next one, which a single worker prefetches itself) are skipped,
+        // and the prefetcher stops once the queue is exhausted.
+        let first_batched = if jobs == 1 { 2 } else { jobs };
+        if total_files > first_batched {
+            let (queue, next_file) = (&actionable_files, &next_file);
+            let lookahead = usize::from(jobs == 1);
+            scope.spawn(move || {
+                metadata::prefetch_mediainfo(queue, || {
+                    (next_file.load(AtomicOrdering::Relaxed) + lookahead).max(first_batched)
+                })
+            });
         }
 
-        match pipeline::convert_file(file, &final_args) {
-            Ok(true) => succeeded += 1,
-            Ok(false) => {
-                progress::print_error(&format!("Failed to process: {}", file));
-                failed += 1;
-            }
-            Err(e) => {
-                progress::print_error(&format!("Error processing '{}': {}", file, e));
-                failed += 1;
-            }
+        for _ in 0..jobs {
+            scope.spawn(|| {
+                let mut prefetch: Option<thread::ScopedJoinHandle<'_, ()>> = None;
+                loop {
+                    let idx = next_file.fetch_add(1, AtomicOrdering::Relaxed);
+                    let Some(file) = actionable_files.get(idx) else {
+                        break;
+                    };
+
+                    // Under --jobs every status line of this file carries the same tag.
+                    progress::set_file_tag(&format!("file {}/{}", idx + 1, total_files));
+                    if total_files > 1 && !progress::is_quiet() {
+                        eprintln!(
+                            "\n{}",
+                            progress::for_stderr(
+                                format!("── File {}/{} ──", idx + 1, total_files)
+                                    .cyan()
+                                    .dimmed()
+                            )
+                        );
+                    }
+
+                    // Probe the next queued file while this one converts (single-job runs
+                    // only; with more workers the probes already overlap other conversions).
+                    if let Some(handle) = prefetch.take() {
+                        let _ = handle.join();
+                    }
+                    if jobs == 1 {
+                        if let Some(next) = actionable_files.get(idx + 1) {
+                            prefetch = Some(scope.spawn(move || {
+                                let _ = metadata::get_mediainfo_json(next);
+                            }));
+                        }
+                    }
+
+                    let result = pipeline::convert_file(file, &final_args);
+                    metadata::forget_probe_cache(file);
+
+                    match result {
+                        Ok(true) => {
+                            succeeded.fetch_add(1, AtomicOrdering::Relaxed);
+                        }
+                        Ok(false) => {
+                            progress::print_error(&format!("Failed to process: {}", file));
+                            failed.fetch_add(1, AtomicOrdering::Relaxed);
+                        }
+                        Err(e) => {
+                            progress::print_error(&format!("Error processing '{}': {}", file, e));
+                            failed.fetch_add(1, AtomicOrdering::Relaxed);
+                        }
+                    }
+                }
+            });
         }
-    }
+    });
+
+    let succeeded = succeeded.into_inner();
+    let failed = failed.into_inner();
 
     // --- Summary ---
     let total_elapsed = run_start.elapsed();
@@ -292,28 +377,34 @@ fn main() -> anyhow::Result<()> {
         if failed == 0 {
             eprintln!(
                 "{}",
-                format!(
-                    "✓ All done — {} file(s) converted in {}",
-                    succeeded, elapsed_str
+                progress::for_stderr(
+                    format!(
+                        "✓ All done — {} file(s) converted in {}",
+                        succeeded, elapsed_str
+                    )
+                    .green()
+                    .bold()
                 )
-                .green()
-                .bold()
             );
         } else {
             eprintln!(
                 "{}",
-                format!(
-                    "Done — {} succeeded, {} failed ({} total)",
-                    succeeded, failed, elapsed_str
+                progress::for_stderr(
+                    format!(
+                        "Done — {} succeeded, {} failed ({} total)",
+                        succeeded, failed, elapsed_str
+                    )
+                    .yellow()
+                    .bold()
                 )
-                .yellow()
-                .bold()
             );
         }
         if skipped > 0 {
             eprintln!(
                 "{}",
-                format!("  ({} file(s) skipped — already converted)", skipped).dimmed()
+                progress::for_stderr(
+                    format!("  ({} file(s) skipped — already converted)", skipped).dimmed()
+                )
             );
         }
     }
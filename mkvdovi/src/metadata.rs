@@ -1,11 +1,14 @@
 use anyhow::{Context, Result};
 use regex::Regex;
-use serde::Deserialize;
+use serde::{Deserialize, Serialize};
 use serde_json::{json, Value};
-use std::collections::HashMap;
+use std::collections::{HashMap, VecDeque};
 use std::fs::{self, File};
+use std::io::{BufWriter, Write};
 use std::path::{Path, PathBuf};
-use std::process::Command;
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, SystemTime};
 
 use crate::external;
 use crate::rpu_check::{self, Level5Offsets, RpuFormatKind};
@@ -59,30 +62,376 @@ impl Default for CmV40Config {
     }
 }
 
+/// Cache key for probe results: the resolved path plus its size and mtime, so a file that is
+/// rewritten between calls (e.g. a re-muxed output) is probed again.
+#[derive(Debug, Clone, PartialEq, Eq, Hash)]
+struct ProbeKey {
+    path: PathBuf,
+    len: u64,
+    modified: Option<SystemTime>,
+}
+
+impl ProbeKey {
+    fn for_file(input_file: &str) -> Option<Self> {
+        let path = fs::canonicalize(input_file).ok()?;
+        let meta = fs::metadata(&path).ok()?;
+        Some(Self {
+            path,
+            len: meta.len(),
+            modified: meta.modified().ok(),
+        })
+    }
+}
+
+static PROBE_DISK_CACHE: AtomicBool = AtomicBool::new(true);
+
+/// Enable or disable the persistent probe cache (`--no-probe-cache`).
+pub fn set_probe_disk_cache(enabled: bool) {
+    PROBE_DISK_CACHE.store(enabled, Ordering::SeqCst);
+}
+
+/// Per-user directory for probe results that outlive the process, so re-running a batch (or
+/// resuming one) does not re-probe unchanged sources. `None` disables the disk cache.
+fn probe_disk_cache_dir() -> Option<PathBuf> {
+    if !PROBE_DISK_CACHE.load(Ordering::SeqCst) {
+        return None;
+    }
+    let base = std::env::var_os("XDG_CACHE_HOME")
+        .filter(|v| !v.is_empty())
+        .map(PathBuf::from)
+        .or_else(|| std::env::var_os("LOCALAPPDATA").map(PathBuf::from))
+        .or_else(|| std::env::var_os("HOME").map(|home| Path::new(&home).join(".cache")))?;
+    Some(base.join("mkvdovi").join("probe"))
+}
+
+/// Identity of the probing tool: its resolved binary plus that file's mtime. Part of every
+/// disk cache key, so upgrading MediaInfo or ffprobe invalidates the old version's output.
+fn probe_tool_stamp(tool: &str) -> String {
+    let Some(path) = external::find_tool(tool) else {
+        return String::new();
+    };
+    let modified_ns = fs::metadata(&path)
+        .and_then(|meta| meta.modified())
+        .ok()
+        .and_then(|t| t.duration_since(SystemTime::UNIX_EPOCH).ok())
+        .map_or(0, |d| d.as_nanos());
+    format!("{}@{}", path.display(), modified_ns)
+}
+
+/// On-disk entry: the full key is stored beside the data and compared on read, so a hash
+/// collision (or a hasher change between builds) reads as a miss rather than wrong data.
+#[derive(Serialize, Deserialize)]
+struct DiskProbeEntry {
+    path: PathBuf,
+    len: u64,
+    modified_ns: Option<u128>,
+    tool: String,
+    data: Value,
+}
+
+/// Entries older than this are dropped. Sources are usually deleted or replaced after
+/// conversion, so an old entry is almost always an orphan.
+const PROBE_CACHE_MAX_AGE: Duration = Duration::from_secs(30 * 24 * 60 * 60);
+
+/// Most entries kept per probe kind; the oldest beyond this are dropped.
+const PROBE_CACHE_MAX_ENTRIES: usize = 4096;
+
+impl ProbeKey {
+    fn modified_ns(&self) -> Option<u128> {
+        self.modified
+            .and_then(|t| t.duration_since(SystemTime::UNIX_EPOCH).ok())
+            .map(|d| d.as_nanos())
+    }
+
+    fn disk_cache_file(&self, root: &Path, kind: &str, tool: &str) -> PathBuf {
+        use std::hash::{Hash, Hasher};
+        let mut hasher = std::collections::hash_map::DefaultHasher::new();
+        (kind, &self.path, self.len, self.modified_ns(), tool).hash(&mut hasher);
+        root.join(kind)
+            .join(format!("{:016x}.json", hasher.finish()))
+    }
+}
+
+fn read_disk_probe(root: &Path, kind: &str, key: &ProbeKey, tool: &str) -> Option<Value> {
+    let text = fs::read_to_string(key.disk_cache_file(root, kind, tool)).ok()?;
+    let entry: DiskProbeEntry = serde_json::from_str(&text).ok()?;
+    (entry.path == key.path
+        && entry.len == key.len
+        && entry.modified_ns == key.modified_ns()
+        && entry.tool == tool)
+        .then_some(entry.data)
+}
+
+/// Best effort: an unwritable cache directory only costs a re-probe next run. The first
+/// write of a process also prunes the cache, so it does not grow without bound.
+fn write_disk_probe(root: &Path, kind: &str, key: &ProbeKey, tool: &str, data: &Value) {
+    static PRUNED: AtomicBool = AtomicBool::new(false);
+    if !PRUNED.swap(true, Ordering::SeqCst) {
+        if let Ok(kinds) = fs::read_dir(root) {
+            for kind_dir in kinds.flatten() {
+                prune_disk_probes(
+                    &kind_dir.path(),
+                    SystemTime::now(),
+                    PROBE_CACHE_MAX_AGE,
+                    PROBE_CACHE_MAX_ENTRIES,
+                );
+            }
+        }
+    }
+
+    let file = key.disk_cache_file(root, kind, tool);
+    let Some(dir) = file.parent() else {
+        return;
+    };
+    let entry = DiskProbeEntry {
+        path: key.path.clone(),
+        len: key.len,
+        modified_ns: key.modified_ns(),
+        tool: tool.to_string(),
+        data: data.clone(),
+    };
+    let Ok(text) = serde_json::to_string(&entry) else {
+        return;
+    };
+    // Write under a name unique to this call and rename, so concurrent writers (worker
+    // threads, the prefetchers, other processes) never truncate each other's temp file or
+    // expose a partial entry.
+    static NEXT_ID: AtomicUsize = AtomicUsize::new(0);
+    let id = NEXT_ID.fetch_add(1, Ordering::Relaxed);
+    let tmp = file.with_extension(format!("{}_{}.tmp", std::process::id(), id));
+    if fs::create_dir_all(dir).is_ok() && fs::write(&tmp, text).is_ok() {
+        if fs::rename(&tmp, &file).is_err() {
+            let _ = fs::remove_file(&tmp);
+        }
+    }
+}
+
+/// Remove entries in one kind's cache directory that are older than `max_age`, then the
+/// oldest ones beyond `max_entries`. Stray temp files from killed runs age out the same way.
+fn prune_disk_probes(dir: &Path, now: SystemTime, max_age: Duration, max_entries: usize) {
+    let Ok(listing) = fs::read_dir(dir) else {
+        return;
+    };
+    let mut entries: Vec<(SystemTime, PathBuf)> = listing
+        .flatten()
+        .filter_map(|entry| {
+            let meta = entry.metadata().ok()?;
+            if !meta.is_file() {
+                return None;
+            }
+            Some((meta.modified().ok()?, entry.path()))
+        })
+        .collect();
+    entries.sort();
+
+    let excess = entries.len().saturating_sub(max_entries);
+    for (idx, (modified, path)) in entries.iter().enumerate() {
+        let expired = now.duration_since(*modified).is_ok_and(|age| age > max_age);
+        if idx < excess || expired {
+            let _ = fs::remove_file(path);
+        }
+    }
+}
+
+/// Run a probe through the persistent cache. The file is stat'ed again after probing and the
+/// result is only stored if it was not modified meanwhile.
+fn probe_with_disk_cache(
+    kind: &str,
+    input_file: &str,
+    key: Option<&ProbeKey>,
+    probe: impl FnOnce() -> Result<Value>,
+) -> Result<Value> {
+    let root = probe_disk_cache_dir();
+    let tool = probe_tool_stamp(kind);
+    if let (Some(root), Some(key)) = (&root, key) {
+        if let Some(hit) = read_disk_probe(root, kind, key, &tool) {
+            return Ok(hit);
+        }
+    }
+    let value = probe()?;
+    if let (Some(root), Some(key)) = (&root, key) {
+        if ProbeKey::for_file(input_file).as_ref() == Some(key) {
+            write_disk_probe(root, kind, key, &tool, &value);
+        }
+    }
+    Ok(value)
+}
+
+/// Most MediaInfo results kept in memory at once. A conversion re-reads its own source a
+/// few times in quick succession, so a handful of entries per in-flight file is plenty;
+/// anything evicted is still answered by the disk cache.
+const MEDIAINFO_CACHE_CAPACITY: usize = 16;
+
+/// Small least-recently-used map of probe results. Inserting a new version of a path drops
+/// the entry for its previous version, so rewritten files (e.g. a re-muxed output) do not
+/// pile up.
+struct ProbeLru {
+    entries: VecDeque<(ProbeKey, Value)>,
+    capacity: usize,
+}
+
+impl ProbeLru {
+    fn new(capacity: usize) -> Self {
+        Self {
+            entries: VecDeque::with_capacity(capacity),
+            capacity,
+        }
+    }
+
+    fn get(&mut self, key: &ProbeKey) -> Option<Value> {
+        let idx = self.entries.iter().position(|(k, _)| k == key)?;
+        let entry = self.entries.remove(idx)?;
+        let value = entry.1.clone();
+        self.entries.push_back(entry);
+        Some(value)
+    }
+
+    fn insert(&mut self, key: ProbeKey, value: Value) {
+        self.entries.retain(|(k, _)| k.path != key.path);
+        if self.entries.len() >= self.capacity {
+            self.entries.pop_front();
+        }
+        self.entries.push_back((key, value));
+    }
+
+    fn forget(&mut self, path: &Path) {
+        self.entries.retain(|(k, _)| k.path != path);
+    }
+}
+
+fn mediainfo_cache() -> &'static Mutex<ProbeLru> {
+    static CACHE: OnceLock<Mutex<ProbeLru>> = OnceLock::new();
+    CACHE.get_or_init(|| Mutex::new(ProbeLru::new(MEDIAINFO_CACHE_CAPACITY)))
+}
+
+/// Full MediaInfo JSON for `input_file`. Results are memoized per file version, since one
+/// conversion asks for them several times (format detection, static metadata, primaries,
+/// duration), and persisted in the user cache directory across runs.
 pub fn get_mediainfo_json(input_file: &str) -> Result<Value> {
-    // Basic cache logic could be added using OnceLock or just re-run (fast enough)
-    let mut cmd = Command::new("mediainfo");
-    cmd.arg("--Output=JSON").arg(input_file);
-    let out = external::get_command_output(&mut cmd)?;
-    serde_json::from_str(&out).context("Failed to parse mediainfo JSON")
+    let key = ProbeKey::for_file(input_file);
+    if let Some(key) = &key {
+        if let Some(cached) = mediainfo_cache().lock().unwrap().get(key) {
+            return Ok(cached);
+        }
+    }
+
+    let json = probe_with_disk_cache("mediainfo", input_file, key.as_ref(), || {
+        let mut cmd = external::tool_command("mediainfo");
+        cmd.arg("--Output=JSON").arg(input_file);
+        let out = external::get_command_output_bytes(&mut cmd)?;
+        serde_json::from_slice(&out).context("Failed to parse mediainfo JSON")
+    })?;
+
+    if let Some(key) = key {
+        mediainfo_cache().lock().unwrap().insert(key, json.clone());
+    }
+    Ok(json)
+}
+
+/// Drop memoized probe results for `input_file` once its conversion is finished, so a long
+/// batch does not keep every file's MediaInfo JSON alive.
+pub fn forget_probe_cache(input_file: &str) {
+    if let Ok(path) = fs::canonicalize(input_file) {
+        mediainfo_cache().lock().unwrap().forget(&path);
+    }
 }
 
+/// Files per MediaInfo invocation when prewarming. Small enough that the command line stays
+/// well within OS limits and that a run ending mid-batch only waits for a few probes.
+const MEDIAINFO_BATCH: usize = 8;
+
+/// Split the output of a multi-file MediaInfo run into `(@ref, per-file JSON)` pairs. Each
+/// per-file value has the same shape as a single-file run. With one input MediaInfo prints a
+/// bare object instead of an array.
+fn mediainfo_batch_entries(json: Value) -> Vec<(String, Value)> {
+    let items = match json {
+        Value::Array(items) => items,
+        other => vec![other],
+    };
+    items
+        .into_iter()
+        .filter_map(|item| {
+            let reference = item.get("media")?.get("@ref")?.as_str()?.to_string();
+            Some((reference, item))
+        })
+        .collect()
+}
+
+/// Probe queued `files` with one MediaInfo process per batch and store each result in the
+/// persistent cache, so the per-file `get_mediainfo_json` calls later in the run are cache
+/// hits instead of one spawn each. `first_unclaimed` gives the index of the first file no
+/// worker has picked up yet; it is re-read before every batch so claimed files are skipped
+/// and prefetching ends as soon as the queue is exhausted. Best effort: files that are
+/// already cached, missing, fail to probe, or change meanwhile are left to the normal path.
+/// No-op without the disk cache.
+pub fn prefetch_mediainfo(files: &[String], first_unclaimed: impl Fn() -> usize) {
+    let Some(root) = probe_disk_cache_dir() else {
+        return;
+    };
+    let tool = probe_tool_stamp("mediainfo");
+    let mut cursor = 0;
+    loop {
+        cursor = cursor.max(first_unclaimed());
+        if cursor >= files.len() {
+            break;
+        }
+        // Sources are stat'ed here rather than up front, so files deleted by earlier
+        // conversions drop out of the batch.
+        let mut batch: Vec<(&str, ProbeKey)> = Vec::with_capacity(MEDIAINFO_BATCH);
+        while batch.len() < MEDIAINFO_BATCH && cursor < files.len() {
+            let file = files[cursor].as_str();
+            cursor += 1;
+            if let Some(key) = ProbeKey::for_file(file) {
+                if !key.disk_cache_file(&root, "mediainfo", &tool).is_file() {
+                    batch.push((file, key));
+                }
+            }
+        }
+        if batch.is_empty() {
+            continue;
+        }
+
+        let mut cmd = external::tool_command("mediainfo");
+        cmd.arg("--Output=JSON")
+            .args(batch.iter().map(|(file, _)| *file));
+        let Ok(out) = external::get_command_output_bytes(&mut cmd) else {
+            continue;
+        };
+        let Ok(json) = serde_json::from_slice::<Value>(&out) else {
+            continue;
+        };
+        for (reference, data) in mediainfo_batch_entries(json) {
+            let resolved = fs::canonicalize(&reference).ok();
+            let matched = batch
+                .iter()
+                .find(|(file, key)| *file == reference || resolved.as_ref() == Some(&key.path));
+            if let Some((file, key)) = matched {
+                if ProbeKey::for_file(file).as_ref() == Some(key) {
+                    write_disk_probe(&root, "mediainfo", key, &tool, &data);
+                }
+            }
+        }
+    }
+}
+
+/// Container and stream info from ffprobe. Frame-level data is not requested: the only
+/// consumer reads stream `color_transfer`, and `-show_frames` makes ffprobe decode.
 pub fn get_ffprobe_json(input_file: &str) -> Result<Value> {
-    let mut cmd = Command::new("ffprobe");
-    cmd.args([
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_format",
-        "-show_streams",
-        "-show_frames",
-        "-read_intervals",
-        "%+#1",
-        input_file,
-    ]);
-    let out = external::get_command_output(&mut cmd)?;
-    serde_json::from_str(&out).context("Failed to parse ffprobe JSON")
+    let key = ProbeKey::for_file(input_file);
+    probe_with_disk_cache("ffprobe", input_file, key.as_ref(), || {
+        let mut cmd = external::tool_command("ffprobe");
+        cmd.args([
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            input_file,
+        ]);
+        let out = external::get_command_output_bytes(&mut cmd)?;
+        serde_json::from_slice(&out).context("Failed to parse ffprobe JSON")
+    })
 }
 
 pub fn find_measurements_file(input_file: &Path) -> Option<PathBuf> {
@@ -98,16 +447,10 @@ pub fn find_measurements_file(input_file: &Path) -> Option<PathBuf> {
         dir.join(format!("{}_measurements.bin", stem)),
     ];
 
-    for candidate in &candidates {
-        if candidate.exists() {
-            return Some(candidate.clone());
-        }
-    }
-
     // Globbing is strictly needed if pattern matching logic is fuzzy but candidates usually cover it.
     // The python script does glob for exact prefixes.
     // Simplifying for now: exact matches are most common.
-    None
+    candidates.into_iter().find(|c| c.is_file())
 }
 
 pub fn find_details_file(input_file: &Path) -> Option<PathBuf> {
@@ -119,56 +462,29 @@ pub fn find_details_file(input_file: &Path) -> Option<PathBuf> {
         dir.join(format!("{}_Details.txt", stem)),
     ];
 
-    for candidate in &candidates {
-        if candidate.exists() {
-            return Some(candidate.clone());
-        }
-    }
-    None
+    candidates.into_iter().find(|c| c.is_file())
 }
 
 pub fn check_hdr_format(input_file: &str) -> HdrFormat {
     let path = Path::new(input_file);
 
-    // 1. MediaInfo checks. Some HLG MKVs expose HLG only as
-    // transfer_characteristics_Original while HDR_Format remains empty.
-    let mut mi_hints = match Command::new("mediainfo")
-        .args([
-            "--Inform=Video;%HDR_Format%/%HDR_Format_Compatibility%",
-            input_file,
-        ])
-        .output()
-    {
-        Ok(o) => String::from_utf8_lossy(&o.stdout).to_string(),
-        Err(_) => String::new(),
-    };
-
+    // 1. MediaInfo checks, all from the JSON probe shared (memoized) with get_static_metadata
+    // and the primaries check. Its video-track HDR fields carry HDR_Format and
+    // HDR_Format_Compatibility (including the Dolby Vision profile and level), and
+    // transfer_characteristics_Original, which is where some HLG MKVs expose HLG while
+    // HDR_Format remains empty. Only the codec ID has to be added for the Dolby Vision check.
+    let mut mi_hints = String::new();
+    let mut mi_codec = String::new();
+    let mut mi_transfer_known = false;
     if let Ok(json) = get_mediainfo_json(input_file) {
         append_mediainfo_video_hints(&json, &mut mi_hints);
+        mi_codec = mediainfo_video_codec_ids(&json);
+        mi_transfer_known = mediainfo_reports_transfer(&json);
     }
 
-    // Check for Dolby Vision Profile 7 FEL (dual layer)
-    // MediaInfo shows "dvhe.07" or "Dolby Vision, Version 1.0, Profile 7"
-    let mi_dv_text = match Command::new("mediainfo")
-        .args([
-            "--Inform=Video;%HDR_Format%/%HDR_Format_Profile%/%HDR_Format_Level%",
-            input_file,
-        ])
-        .output()
-    {
-        Ok(o) => String::from_utf8_lossy(&o.stdout).to_string(),
-        Err(_) => String::new(),
-    };
-
     // Detect Dolby Vision before generic HDR10/PQ fallback.
-    let mi_codec = match Command::new("mediainfo")
-        .args(["--Inform=Video;%CodecID%", input_file])
-        .output()
-    {
-        Ok(o) => String::from_utf8_lossy(&o.stdout).to_string(),
-        Err(_) => String::new(),
-    };
-    let dv_probe = format!("{} / {} / {}", mi_hints, mi_dv_text, mi_codec).to_lowercase();
+    // MediaInfo shows "dvhe.07" or "Dolby Vision, Version 1.0, Profile 7" for Profile 7.
+    let dv_probe = format!("{} / {}", mi_hints, mi_codec).to_lowercase();
 
     if dv_probe.contains("dvhe") || dv_probe.contains("dolby vision") {
         if dv_probe.contains("dvhe.08") || dv_probe.contains("profile 8") {
@@ -190,6 +506,12 @@ pub fn check_hdr_format(input_file: &str) -> HdrFormat {
         return format;
     }
 
+    // MediaInfo read the transfer characteristics and they are not HDR (e.g. BT.709):
+    // ffprobe would report the same signalling, so skip spawning it.
+    if mi_transfer_known {
+        return HdrFormat::Unsupported;
+    }
+
     // 2. Fallback to FFprobe
     // (Simplification: Assuming mediainfo is usually correct or sufficient for now)
     // If MediaInfo failed to detect, check ffprobe color_transfer
@@ -211,20 +533,18 @@ pub fn check_hdr_format(input_file: &str) -> HdrFormat {
     HdrFormat::Unsupported
 }
 
-fn append_mediainfo_video_hints(json: &Value, hints: &mut String) {
-    let Some(tracks) = json
-        .get("media")
+/// The video tracks of a MediaInfo JSON document, in file order.
+fn mediainfo_video_tracks(json: &Value) -> impl Iterator<Item = &Value> {
+    json.get("media")
         .and_then(|m| m.get("track"))
         .and_then(|t| t.as_array())
-    else {
-        return;
-    };
-
-    for track in tracks {
-        if track.get("@type").and_then(|s| s.as_str()) != Some("Video") {
-            continue;
-        }
+        .into_iter()
+        .flatten()
+        .filter(|track| track.get("@type").and_then(|s| s.as_str()) == Some("Video"))
+}
 
+fn append_mediainfo_video_hints(json: &Value, hints: &mut String) {
+    for track in mediainfo_video_tracks(json) {
         let Some(fields) = track.as_object() else {
             continue;
         };
@@ -243,6 +563,23 @@ fn append_mediainfo_video_hints(json: &Value, hints: &mut String) {
     }
 }
 
+/// True when a video track in the MediaInfo JSON states its transfer characteristics.
+fn mediainfo_reports_transfer(json: &Value) -> bool {
+    mediainfo_video_tracks(json).any(|track| {
+        track
+            .get("transfer_characteristics")
+            .and_then(|s| s.as_str())
+            .is_some_and(|s| !s.trim().is_empty())
+    })
+}
+
+fn mediainfo_video_codec_ids(json: &Value) -> String {
+    mediainfo_video_tracks(json)
+        .filter_map(|track| track.get("CodecID").and_then(|s| s.as_str()))
+        .collect::<Vec<_>>()
+        .join(" / ")
+}
+
 fn classify_hdr_hints(hints: &str, measurements: bool) -> Option<HdrFormat> {
     let hints = hints.to_uppercase();
 
@@ -267,9 +604,16 @@ fn classify_hdr_hints(hints: &str, measurements: bool) -> Option<HdrFormat> {
     None
 }
 
+/// Per-call scratch directory under the system temp dir. The counter keeps concurrent
+/// conversions (`--jobs`) in one process from sharing and deleting each other's probes.
+fn probe_scratch_dir(prefix: &str) -> PathBuf {
+    static NEXT_ID: AtomicUsize = AtomicUsize::new(0);
+    let id = NEXT_ID.fetch_add(1, Ordering::Relaxed);
+    std::env::temp_dir().join(format!("{}_{}_{}", prefix, std::process::id(), id))
+}
+
 fn probe_profile7_kind(input_file: &str) -> Option<HdrFormat> {
-    let mut temp_dir = std::env::temp_dir();
-    temp_dir.push(format!("mkvdovi_dv_probe_{}", std::process::id()));
+    let temp_dir = probe_scratch_dir("mkvdovi_dv_probe");
     fs::create_dir_all(&temp_dir).ok()?;
 
     let result = rpu_check::extract_rpu_sample(input_file, &temp_dir)
@@ -282,8 +626,7 @@ fn probe_profile7_kind(input_file: &str) -> Option<HdrFormat> {
 }
 
 fn sniff_dolby_vision_rpu(input_file: &str) -> Option<HdrFormat> {
-    let mut temp_dir = std::env::temp_dir();
-    temp_dir.push(format!("mkvdovi_dv_sniff_{}", std::process::id()));
+    let temp_dir = probe_scratch_dir("mkvdovi_dv_sniff");
     fs::create_dir_all(&temp_dir).ok()?;
     let rpu_path = temp_dir.join("sniff_RPU.bin");
 
@@ -308,81 +651,123 @@ fn hdr_format_from_rpu(kind: RpuFormatKind) -> HdrFormat {
     }
 }
 
+fn mdl_max_re() -> &'static Regex {
+    static RE: OnceLock<Regex> = OnceLock::new();
+    RE.get_or_init(|| Regex::new(r"max: ([0-9.]+)").unwrap())
+}
+
+fn mdl_min_re() -> &'static Regex {
+    static RE: OnceLock<Regex> = OnceLock::new();
+    RE.get_or_init(|| Regex::new(r"min: ([0-9.]+)").unwrap())
+}
+
+fn number_re() -> &'static Regex {
+    static RE: OnceLock<Regex> = OnceLock::new();
+    RE.get_or_init(|| Regex::new(r"([0-9.]+)").unwrap())
+}
+
+/// Byte-oriented so Details.txt is matched as read, without UTF-8 validation; files saved in
+/// a legacy code page (e.g. with accented title names) still parse.
+fn details_light_level_re() -> &'static regex::bytes::Regex {
+    static RE: OnceLock<regex::bytes::Regex> = OnceLock::new();
+    RE.get_or_init(|| regex::bytes::Regex::new(r"(?i-u)Max(CLL|FALL)\s*:\s*([0-9.,]+)").unwrap())
+}
+
+/// MaxCLL and MaxFALL from a madVR Details.txt, in one scan of the text. The first entry of
+/// each kind wins; a decimal comma is accepted.
+fn parse_details_light_levels(content: &[u8]) -> (Option<f64>, Option<f64>) {
+    let mut max_cll: Option<Option<f64>> = None;
+    let mut max_fall: Option<Option<f64>> = None;
+    for caps in details_light_level_re().captures_iter(content) {
+        let slot = if caps[1].eq_ignore_ascii_case(b"CLL") {
+            &mut max_cll
+        } else {
+            &mut max_fall
+        };
+        if slot.is_none() {
+            // The capture is ASCII digits and separators only.
+            let number = String::from_utf8_lossy(&caps[2]).replace(',', ".");
+            *slot = Some(number.parse::<f64>().ok());
+        }
+        if max_cll.is_some() && max_fall.is_some() {
+            break;
+        }
+    }
+    (max_cll.flatten(), max_fall.flatten())
+}
+
+/// A labelled chromaticity pair in MediaInfo's MasteringDisplay_ColorPrimaries, in either
+/// form: `G(x=0.1700, y=0.7970)` or `G(0.1700,0.7970)`.
+fn primaries_re() -> &'static Regex {
+    static RE: OnceLock<Regex> = OnceLock::new();
+    RE.get_or_init(|| {
+        Regex::new(r"(WP|G|B|R)\(\s*(?:x=)?([0-9]*\.?[0-9]+)\s*,\s*(?:y=)?([0-9]*\.?[0-9]+)\s*\)")
+            .unwrap()
+    })
+}
+
 pub fn get_static_metadata(input_file: &str) -> HashMap<String, f64> {
     let mut meta: HashMap<String, f64> = HashMap::new();
 
     // Try MediaInfo
     if let Ok(json) = get_mediainfo_json(input_file) {
-        if let Some(tracks) = json
-            .get("media")
-            .and_then(|m| m.get("track"))
-            .and_then(|t| t.as_array())
-        {
-            for track in tracks {
-                if track.get("@type").and_then(|s| s.as_str()) == Some("Video") {
-                    // Parse MasteringDisplay_Luminance
-                    if let Some(mdl) = track
-                        .get("MasteringDisplay_Luminance")
-                        .and_then(|s| s.as_str())
-                    {
-                        let re_max = Regex::new(r"max: ([0-9.]+)").unwrap();
-                        let re_min = Regex::new(r"min: ([0-9.]+)").unwrap();
-
-                        if let Some(caps) = re_max.captures(mdl) {
-                            if let Ok(v) = caps[1].parse::<f64>() {
-                                meta.insert("max_dml".to_string(), v);
-                            }
-                        }
-                        if let Some(caps) = re_min.captures(mdl) {
-                            if let Ok(v) = caps[1].parse::<f64>() {
-                                meta.insert("min_dml".to_string(), v);
-                            }
-                        }
+        for track in mediainfo_video_tracks(&json) {
+            // Parse MasteringDisplay_Luminance
+            if let Some(mdl) = track
+                .get("MasteringDisplay_Luminance")
+                .and_then(|s| s.as_str())
+            {
+                if let Some(caps) = mdl_max_re().captures(mdl) {
+                    if let Ok(v) = caps[1].parse::<f64>() {
+                        meta.insert("max_dml".to_string(), v);
                     }
-
-                    // Parse MasteringDisplay_ColorPrimaries
-                    if let Some(mdcp) = track
-                        .get("MasteringDisplay_ColorPrimaries")
-                        .and_then(|s| s.as_str())
-                    {
-                        if let Some((gx, gy, bx, by, rx, ry, wpx, wpy)) =
-                            parse_mastering_display_color_primaries(mdcp)
-                        {
-                            meta.insert("md_gx".to_string(), gx as f64);
-                            meta.insert("md_gy".to_string(), gy as f64);
-                            meta.insert("md_bx".to_string(), bx as f64);
-                            meta.insert("md_by".to_string(), by as f64);
-                            meta.insert("md_rx".to_string(), rx as f64);
-                            meta.insert("md_ry".to_string(), ry as f64);
-                            meta.insert("md_wpx".to_string(), wpx as f64);
-                            meta.insert("md_wpy".to_string(), wpy as f64);
-                        }
+                }
+                if let Some(caps) = mdl_min_re().captures(mdl) {
+                    if let Ok(v) = caps[1].parse::<f64>() {
+                        meta.insert("min_dml".to_string(), v);
                     }
-                    // MaxCLL
-                    if let Some(val) = track.get("MaxCLL") {
-                        if let Some(f) = val.as_f64() {
-                            meta.insert("max_cll".to_string(), f);
-                        } else if let Some(s) = val.as_str() {
-                            let re = Regex::new(r"([0-9.]+)").unwrap();
-                            if let Some(caps) = re.captures(s) {
-                                if let Ok(v) = caps[1].parse::<f64>() {
-                                    meta.insert("max_cll".to_string(), v);
-                                }
-                            }
+                }
+            }
+
+            // Parse MasteringDisplay_ColorPrimaries
+            if let Some(mdcp) = track
+                .get("MasteringDisplay_ColorPrimaries")
+                .and_then(|s| s.as_str())
+            {
+                if let Some((gx, gy, bx, by, rx, ry, wpx, wpy)) =
+                    parse_mastering_display_color_primaries(mdcp)
+                {
+                    meta.insert("md_gx".to_string(), gx as f64);
+                    meta.insert("md_gy".to_string(), gy as f64);
+                    meta.insert("md_bx".to_string(), bx as f64);
+                    meta.insert("md_by".to_string(), by as f64);
+                    meta.insert("md_rx".to_string(), rx as f64);
+                    meta.insert("md_ry".to_string(), ry as f64);
+                    meta.insert("md_wpx".to_string(), wpx as f64);
+                    meta.insert("md_wpy".to_string(), wpy as f64);
+                }
+            }
+            // MaxCLL
+            if let Some(val) = track.get("MaxCLL") {
+                if let Some(f) = val.as_f64() {
+                    meta.insert("max_cll".to_string(), f);
+                } else if let Some(s) = val.as_str() {
+                    if let Some(caps) = number_re().captures(s) {
+                        if let Ok(v) = caps[1].parse::<f64>() {
+                            meta.insert("max_cll".to_string(), v);
                         }
                     }
+                }
+            }
 
-                    // MaxFALL
-                    if let Some(val) = track.get("MaxFALL") {
-                        if let Some(f) = val.as_f64() {
-                            meta.insert("max_fall".to_string(), f);
-                        } else if let Some(s) = val.as_str() {
-                            let re = Regex::new(r"([0-9.]+)").unwrap();
-                            if let Some(caps) = re.captures(s) {
-                                if let Ok(v) = caps[1].parse::<f64>() {
-                                    meta.insert("max_fall".to_string(), v);
-                                }
-                            }
+            // MaxFALL
+            if let Some(val) = track.get("MaxFALL") {
+                if let Some(f) = val.as_f64() {
+                    meta.insert("max_fall".to_string(), f);
+                } else if let Some(s) = val.as_str() {
+                    if let Some(caps) = number_re().captures(s) {
+                        if let Ok(v) = caps[1].parse::<f64>() {
+                            meta.insert("max_fall".to_string(), v);
                         }
                     }
                 }
@@ -392,21 +777,13 @@ pub fn get_static_metadata(input_file: &str) -> HashMap<String, f64> {
 
     // Details.txt override (MaxCLL/MaxFALL only; mastering display comes from container metadata)
     if let Some(details_path) = find_details_file(Path::new(input_file)) {
-        if let Ok(content) = fs::read_to_string(details_path) {
-            let re_cll = Regex::new(r"(?i)MaxCLL\s*:\s*([0-9.,]+)").unwrap();
-            let re_fall = Regex::new(r"(?i)MaxFALL\s*:\s*([0-9.,]+)").unwrap();
-
-            if let Some(caps) = re_cll.captures(&content) {
-                let s = caps[1].replace(',', ".");
-                if let Ok(v) = s.parse::<f64>() {
-                    meta.insert("max_cll".to_string(), v);
-                }
+        if let Ok(content) = fs::read(details_path) {
+            let (max_cll, max_fall) = parse_details_light_levels(&content);
+            if let Some(v) = max_cll {
+                meta.insert("max_cll".to_string(), v);
             }
-            if let Some(caps) = re_fall.captures(&content) {
-                let s = caps[1].replace(',', ".");
-                if let Ok(v) = s.parse::<f64>() {
-                    meta.insert("max_fall".to_string(), v);
-                }
+            if let Some(v) = max_fall {
+                meta.insert("max_fall".to_string(), v);
             }
         }
     }
@@ -430,9 +807,11 @@ pub fn get_static_metadata(input_file: &str) -> HashMap<String, f64> {
     for &(key, default, label) in fallbacks {
         if !meta.contains_key(key) {
             eprintln!(
-                "WARNING: {} not found in source metadata; using default {:.4} nits for the Dolby Vision L6 block. \
+                "{}WARNING: {} not found in source metadata; using default {:.4} nits for the Dolby Vision L6 block. \
                  Use mediainfo to verify the source has mastering display / light-level metadata.",
-                label, default
+                crate::progress::file_tag(),
+                label,
+                default
             );
             meta.insert(key.to_string(), default);
         }
@@ -444,20 +823,20 @@ pub fn get_static_metadata(input_file: &str) -> HashMap<String, f64> {
 fn parse_mastering_display_color_primaries(
     mdcp: &str,
 ) -> Option<(u32, u32, u32, u32, u32, u32, u32, u32)> {
-    fn parse_xy(mdcp: &str, label: &str) -> Option<(f64, f64)> {
-        // Accept both:
-        // - G(x=0.1700, y=0.7970)
-        // - G(0.1700,0.7970)
-        let re = Regex::new(&format!(
-            r"{}\(\s*(?:x=)?([0-9]*\.?[0-9]+)\s*,\s*(?:y=)?([0-9]*\.?[0-9]+)\s*\)",
-            regex::escape(label)
-        ))
-        .ok()?;
-
-        let caps = re.captures(mdcp)?;
-        let x = caps.get(1)?.as_str().parse::<f64>().ok()?;
-        let y = caps.get(2)?.as_str().parse::<f64>().ok()?;
-        Some((x, y))
+    // One pass over the string picks up the first coordinate pair for each label.
+    let mut points: [Option<(f64, f64)>; 4] = [None; 4];
+    for caps in primaries_re().captures_iter(mdcp) {
+        let slot = match &caps[1] {
+            "G" => 0,
+            "B" => 1,
+            "R" => 2,
+            _ => 3, // WP
+        };
+        if points[slot].is_none() {
+            let x = caps[2].parse::<f64>().ok();
+            let y = caps[3].parse::<f64>().ok();
+            points[slot] = x.zip(y);
+        }
     }
 
     fn to_int(v: f64) -> u32 {
@@ -465,10 +844,8 @@ fn parse_mastering_display_color_primaries(
         scaled.clamp(0.0, 50000.0) as u32
     }
 
-    let (gx, gy) = parse_xy(mdcp, "G")?;
-    let (bx, by) = parse_xy(mdcp, "B")?;
-    let (rx, ry) = parse_xy(mdcp, "R")?;
-    let (wpx, wpy) = parse_xy(mdcp, "WP")?;
+    let [(gx, gy), (bx, by), (rx, ry), (wpx, wpy)] =
+        [points[0]?, points[1]?, points[2]?, points[3]?];
 
     Some((
         to_int(gx),
@@ -492,9 +869,10 @@ pub fn detect_source_primaries(input_file: &str) -> u8 {
         Some(idx) => idx,
         None => {
             eprintln!(
-                "WARNING: Source color primaries not detected from MediaInfo; \
+                "{}WARNING: Source color primaries not detected from MediaInfo; \
                  defaulting to BT.2020 (L9 index 2). \
-                 Use --source-primaries 0 to override if content was mastered on P3-D65."
+                 Use --source-primaries 0 to override if content was mastered on P3-D65.",
+                crate::progress::file_tag()
             );
             2
         }
@@ -502,29 +880,21 @@ pub fn detect_source_primaries(input_file: &str) -> u8 {
 }
 
 fn detect_source_primaries_from_mediainfo(json: &Value) -> Option<u8> {
-    let tracks = json
-        .get("media")
-        .and_then(|m| m.get("track"))
-        .and_then(|t| t.as_array())?;
-
-    tracks
-        .iter()
-        .filter(|track| track.get("@type").and_then(|s| s.as_str()) == Some("Video"))
-        .find_map(|track| {
-            // L9 describes the mastering display, not the BT.2020 signal container.
-            track
-                .get("MasteringDisplay_ColorPrimaries")
-                .or_else(|| track.get("mastering_display_color_primaries"))
-                .and_then(|value| value.as_str())
-                .and_then(primary_index_from_label)
-                .or_else(|| {
-                    track
-                        .get("colour_primaries")
-                        .or_else(|| track.get("ColorPrimaries"))
-                        .and_then(|value| value.as_str())
-                        .and_then(primary_index_from_label)
-                })
-        })
+    mediainfo_video_tracks(json).find_map(|track| {
+        // L9 describes the mastering display, not the BT.2020 signal container.
+        track
+            .get("MasteringDisplay_ColorPrimaries")
+            .or_else(|| track.get("mastering_display_color_primaries"))
+            .and_then(|value| value.as_str())
+            .and_then(primary_index_from_label)
+            .or_else(|| {
+                track
+                    .get("colour_primaries")
+                    .or_else(|| track.get("ColorPrimaries"))
+                    .and_then(|value| value.as_str())
+                    .and_then(primary_index_from_label)
+            })
+    })
 }
 
 fn primary_index_from_label(primaries: &str) -> Option<u8> {
@@ -690,8 +1060,11 @@ pub fn generate_extra_json(
         json_content["shots"] = json!(shots);
     }
 
-    let file = File::create(output_path)?;
-    serde_json::to_writer_pretty(file, &json_content)?;
+    // Pretty-printing emits one small write per token; with per-scene shots that is tens of
+    // thousands of syscalls unless buffered.
+    let mut writer = BufWriter::new(File::create(output_path)?);
+    serde_json::to_writer_pretty(&mut writer, &json_content)?;
+    writer.flush()?;
     Ok(())
 }
 
@@ -711,21 +1084,22 @@ fn nits_to_pq_code(nits: u32) -> u32 {
     (pq * MAX_PQ_CODE).round() as u32
 }
 
+/// Width in pixels of the first video track, from the (memoized) MediaInfo JSON.
+pub fn get_video_width_from_mediainfo(input_file: &str) -> Option<u32> {
+    let json = get_mediainfo_json(input_file).ok()?;
+    let width = mediainfo_video_tracks(&json).next()?.get("Width")?;
+    match width {
+        Value::String(s) => s.trim().parse().ok(),
+        other => other.as_u64().and_then(|w| u32::try_from(w).ok()),
+    }
+}
+
 pub fn get_duration_from_mediainfo(input_file: &str) -> Option<f64> {
-    if let Ok(json) = get_mediainfo_json(input_file) {
-        if let Some(tracks) = json
-            .get("media")
-            .and_then(|m| m.get("track"))
-            .and_then(|t| t.as_array())
-        {
-            for track in tracks {
-                if track.get("@type").and_then(|s| s.as_str()) == Some("Video") {
-                    // Duration
-                    if let Some(val) = track.get("Duration") {
-                        return parse_mediainfo_duration_seconds(val);
-                    }
-                }
-            }
+    let json = get_mediainfo_json(input_file).ok()?;
+    for track in mediainfo_video_tracks(&json) {
+        // Duration
+        if let Some(val) = track.get("Duration") {
+            return parse_mediainfo_duration_seconds(val);
         }
     }
     None
@@ -750,6 +1124,165 @@ fn parse_mediainfo_duration_seconds(value: &Value) -> Option<f64> {
 mod tests {
     use super::*;
 
+    #[test]
+    fn dolby_vision_profile_and_codec_come_from_mediainfo_json() {
+        let json = json!({
+            "media": {
+                "track": [
+                    { "@type": "General", "CodecID": "qt  " },
+                    {
+                        "@type": "Video",
+                        "CodecID": "dvhe",
+                        "HDR_Format": "Dolby Vision / SMPTE ST 2086",
+                        "HDR_Format_Profile": "dvhe.07 / ",
+                        "HDR_Format_Level": "06"
+                    }
+                ]
+            }
+        });
+
+        let mut hints = String::new();
+        append_mediainfo_video_hints(&json, &mut hints);
+        assert!(hints.contains("dvhe.07"));
+        assert_eq!(mediainfo_video_codec_ids(&json), "dvhe");
+    }
+
+    #[test]
+    fn mediainfo_transfer_presence_is_read_from_video_tracks() {
+        let sdr = json!({
+            "media": { "track": [
+                { "@type": "General" },
+                { "@type": "Video", "transfer_characteristics": "BT.709" }
+            ]}
+        });
+        assert!(mediainfo_reports_transfer(&sdr));
+
+        let unknown = json!({
+            "media": { "track": [
+                { "@type": "General", "transfer_characteristics": "BT.709" },
+                { "@type": "Video", "Format": "HEVC" }
+            ]}
+        });
+        assert!(!mediainfo_reports_transfer(&unknown));
+    }
+
+    #[test]
+    fn hdr_format_compatibility_comes_from_mediainfo_json() {
+        let json = json!({
+            "media": {
+                "track": [{
+                    "@type": "Video",
+                    "HDR_Format": "SMPTE ST 2094 App 4",
+                    "HDR_Format_Compatibility": "HDR10+ Profile B / HDR10"
+                }]
+            }
+        });
+
+        let mut hints = String::new();
+        append_mediainfo_video_hints(&json, &mut hints);
+        assert_eq!(
+            classify_hdr_hints(&hints, false),
+            Some(HdrFormat::Hdr10Plus)
+        );
+    }
+
+    #[test]
+    fn probe_key_changes_when_file_is_rewritten() {
+        let dir = tempfile::tempdir().unwrap();
+        let path = dir.path().join("clip.mkv");
+        fs::write(&path, b"short").unwrap();
+        let path_str = path.to_str().unwrap();
+
+        let before = ProbeKey::for_file(path_str).unwrap();
+        assert_eq!(ProbeKey::for_file(path_str), Some(before.clone()));
+
+        fs::write(&path, b"a longer rewrite").unwrap();
+        assert_ne!(ProbeKey::for_file(path_str), Some(before));
+        assert_eq!(
+            ProbeKey::for_file(dir.path().join("missing.mkv").to_str().unwrap()),
+            None
+        );
+    }
+
+    #[test]
+    fn probe_lru_evicts_oldest_and_replaces_stale_versions() {
+        let key = |name: &str, len: u64| ProbeKey {
+            path: PathBuf::from(name),
+            len,
+            modified: None,
+        };
+        let mut lru = ProbeLru::new(2);
+        lru.insert(key("a", 1), json!(1));
+        lru.insert(key("b", 1), json!(2));
+        assert_eq!(lru.get(&key("a", 1)), Some(json!(1)));
+
+        // "b" is now least recently used.
+        lru.insert(key("c", 1), json!(3));
+        assert_eq!(lru.get(&key("b", 1)), None);
+        assert_eq!(lru.get(&key("a", 1)), Some(json!(1)));
+
+        // A rewritten "a" replaces the old version instead of evicting "c".
+        lru.insert(key("a", 2), json!(4));
+        assert_eq!(lru.get(&key("a", 1)), None);
+        assert_eq!(lru.get(&key("a", 2)), Some(json!(4)));
+        assert_eq!(lru.get(&key("c", 1)), Some(json!(3)));
+
+        lru.forget(Path::new("c"));
+        assert_eq!(lru.get(&key("c", 1)), None);
+    }
+
+    #[test]
+    fn disk_probe_cache_round_trips_and_rejects_stale_keys() {
+        let dir = tempfile::tempdir().unwrap();
+        let root = dir.path().join("cache");
+        let path = dir.path().join("clip.mkv");
+        fs::write(&path, b"short").unwrap();
+        let key = ProbeKey::for_file(path.to_str().unwrap()).unwrap();
+
+        let tool = "/usr/bin/mediainfo@1";
+        assert_eq!(read_disk_probe(&root, "mediainfo", &key, tool), None);
+        let data = json!({"media": {"track": []}});
+        write_disk_probe(&root, "mediainfo", &key, tool, &data);
+        assert_eq!(read_disk_probe(&root, "mediainfo", &key, tool), Some(data));
+        assert_eq!(read_disk_probe(&root, "ffprobe", &key, tool), None);
+
+        let mut rewritten = key.clone();
+        rewritten.len += 1;
+        assert_eq!(read_disk_probe(&root, "mediainfo", &rewritten, tool), None);
+
+        // An upgraded tool does not reuse the old version's output.
+        assert_eq!(
+            read_disk_probe(&root, "mediainfo", &key, "/usr/bin/mediainfo@2"),
+            None
+        );
+    }
+
+    #[test]
+    fn disk_probe_pruning_drops_expired_and_excess_entries() {
+        let dir = tempfile::tempdir().unwrap();
+        let now = SystemTime::now();
+        let day = Duration::from_secs(24 * 60 * 60);
+        let entry = |name: &str, age_days: u32| {
+            let path = dir.path().join(name);
+            let file = File::create(&path).unwrap();
+            file.set_modified(now - day * age_days).unwrap();
+            path
+        };
+        let expired = entry("expired.json", 40);
+        let oldest = entry("oldest.json", 3);
+        let older = entry("older.json", 2);
+        let newest = entry("newest.json", 1);
+
+        prune_disk_probes(dir.path(), now, day * 30, 10);
+        assert!(!expired.exists());
+        assert!(oldest.exists());
+
+        prune_disk_probes(dir.path(), now, day * 30, 2);
+        assert!(!oldest.exists());
+        assert!(older.exists());
+        assert!(newest.exists());
+    }
+
     #[test]
     fn classify_hlg_from_original_transfer_characteristics() {
         let hints = "BT.2020 (10-bit)\nHLG / BT.2020 (10-bit)";
@@ -776,6 +1309,42 @@ mod tests {
         );
     }
 
+    #[test]
+    fn details_light_levels_take_first_entry_of_each_kind() {
+        let content =
+            b"Title: Caf\xe9\nPeak: 4000 nits\nmaxFALL: 212,5\nMaxCLL : 1043\nMaxCLL: 999\n";
+        assert_eq!(
+            parse_details_light_levels(content),
+            (Some(1043.0), Some(212.5))
+        );
+        assert_eq!(
+            parse_details_light_levels(b"MaxCLL: 800"),
+            (Some(800.0), None)
+        );
+    }
+
+    #[test]
+    fn mastering_display_primaries_parse_both_mediainfo_forms() {
+        let expected = Some((8500, 39850, 6550, 2300, 35400, 14600, 15635, 16450));
+        assert_eq!(
+            parse_mastering_display_color_primaries(
+                "R: x=0.708000 y=0.292000, G(x=0.1700, y=0.7970), B(x=0.1310, y=0.0460), \
+                 R(x=0.7080, y=0.2920), WP(x=0.3127, y=0.3290)"
+            ),
+            expected
+        );
+        assert_eq!(
+            parse_mastering_display_color_primaries(
+                "G(0.1700,0.7970) B(0.1310,0.0460) R(0.7080,0.2920) WP(0.3127,0.3290)"
+            ),
+            expected
+        );
+        assert_eq!(
+            parse_mastering_display_color_primaries("G(0.17,0.797) B(0.131,0.046)"),
+            None
+        );
+    }
+
     #[test]
     fn cm_v40_default_source_primaries_are_bt2020_for_dovi_tool() {
         assert_eq!(CmV40Config::default().source_primary_index, 2);
@@ -934,4 +1503,18 @@ mod tests {
             Some(3438.032)
         );
     }
+
+    #[test]
+    fn mediainfo_batch_output_splits_per_file() {
+        let entry = |name: &str| json!({ "media": { "@ref": name, "track": [] } });
+        let batch = mediainfo_batch_entries(json!([entry("a.mkv"), entry("b.mkv")]));
+        let refs: Vec<&str> = batch.iter().map(|(r, _)| r.as_str()).collect();
+        assert_eq!(refs, ["a.mkv", "b.mkv"]);
+        assert_eq!(batch[1].1, entry("b.mkv"));
+
+        // A single input prints a bare object rather than a one-element array.
+        let single = mediainfo_batch_entries(entry("c.mkv"));
+        assert_eq!(single.len(), 1);
+        assert_eq!(single[0].0, "c.mkv");
+    }
 }
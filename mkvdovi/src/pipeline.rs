@@ -2,6 +2,9 @@ use std::collections::HashSet;
 use std::fs::{self, File};
 use std::path::{Path, PathBuf};
 use std::process::Command;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::OnceLock;
+use std::thread;
 use std::time::Instant;
 
 use anyhow::{Context, Result};
@@ -18,10 +21,15 @@ use crate::rpu_check::{self, Level5Offsets};
 
 pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     let input_path = Path::new(input_file);
-    if !input_path.exists() {
-        progress::print_warn(&format!("Input file not found: {}", input_file));
-        return Ok(false);
-    }
+    // The source size is the progress total for every stream copy of the source (HEVC
+    // extract, BL extract, mux), so one stat serves as the existence check and all of them.
+    let source_len = match fs::metadata(input_path) {
+        Ok(meta) => Some(meta.len()),
+        Err(_) => {
+            progress::print_warn(&format!("Input file not found: {}", input_file));
+            return Ok(false);
+        }
+    };
 
     // Output filename: name.DV.mkv. A repair of an existing `name.DV.mkv` gets a distinct,
     // deterministic name so the source and rebuilt candidate can coexist for A/B testing.
@@ -32,18 +40,22 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     let resume_enabled = !args.no_resume;
     let temp_dir_name = format!("mkvdovi_temp_{}", stem);
     let mut temp_dir = dir.join(&temp_dir_name);
+    // Stat the temp dir once; the answer decides both resuming and the reset below, which
+    // matters on network shares where every metadata round trip is slow.
+    let mut temp_dir_exists = temp_dir.exists();
     // Pre-rename compat (mkvdolby -> mkvdovi in v0.3.0): resume from a leftover
     // `mkvdolby_temp_*` directory when no new-style one exists. Remove after one release.
-    if resume_enabled && !temp_dir.exists() {
+    if resume_enabled && !temp_dir_exists {
         let legacy_temp_dir = dir.join(format!("mkvdolby_temp_{}", stem));
         if legacy_temp_dir.exists() {
             temp_dir = legacy_temp_dir;
+            temp_dir_exists = true;
         }
     }
 
     // A leftover temp dir means a previous run for this file was interrupted. With resume
     // enabled we reuse its completed steps; otherwise we discard it and start clean.
-    let resuming = resume_enabled && temp_dir.exists();
+    let resuming = resume_enabled && temp_dir_exists;
 
     if output_file.exists() && !resuming {
         progress::print_warn(&format!(
@@ -58,16 +70,18 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     if !progress::is_quiet() {
         eprintln!(
             "\n{}",
-            format!("━━━ Processing: {} ━━━", display_name)
-                .cyan()
-                .bold()
+            progress::for_stderr(
+                format!("━━━ Processing: {} ━━━", display_name)
+                    .cyan()
+                    .bold()
+            )
         );
     }
 
     let file_start = Instant::now();
 
     // Create (or reset) the temp directory.
-    if temp_dir.exists() && !resuming {
+    if temp_dir_exists && !resuming {
         let _ = fs::remove_dir_all(&temp_dir);
     }
     fs::create_dir_all(&temp_dir).context("Failed to create temp directory")?;
@@ -149,14 +163,25 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
         );
         match extract_hdr10plus_metadata(input_file, &temp_dir, resume_enabled, args.stall_timeout)
         {
-            Ok(Some(json_path)) => hdr10plus_json = Some(json_path),
+            Ok(Some(json_path)) => {
+                hdr10plus_json = Some(json_path);
+                // The stream extracted for hdr10plus_tool is the same `-c:v copy` HEVC the base
+                // layer step would produce, so it doubles as the BL instead of a second copy.
+                let hevc = temp_dir.join("video.hevc");
+                if resume::is_complete(&hevc) {
+                    bl_source_file = hevc;
+                }
+            }
             Ok(None) => {
                 progress::print_warn(
                     "HDR10+ tagged but no dynamic metadata found. Falling back to HDR10 analysis.",
                 );
                 hdr_type = HdrFormat::Hdr10Unsupported;
             }
-            Err(_) => return Ok(false),
+            Err(e) => {
+                progress::print_error(&format!("{e:#}"));
+                return Ok(false);
+            }
         }
     }
 
@@ -215,7 +240,7 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
             // duration the seek-based crop probes are unavailable and the in-stream fallback
             // can commit a degenerate active area on dark openings. MEL base-layer pixels are
             // identical in the source.
-            measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args)?;
+            measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args, true)?;
             if measurements_file.is_none() {
                 return Ok(false);
             }
@@ -228,8 +253,13 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
 
             let mut extra_args = Vec::new();
             add_optimizer_args(&mut extra_args, args);
-            measurements_file =
-                run_hdr_analyzer(composited.to_str().unwrap(), &temp_dir, &extra_args, args)?;
+            measurements_file = run_hdr_analyzer(
+                composited.to_str().unwrap(),
+                &temp_dir,
+                &extra_args,
+                args,
+                true,
+            )?;
             if measurements_file.is_none() {
                 progress::print_error(
                     "Failed to generate measurements from the composited FEL output.",
@@ -261,7 +291,7 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
             let mut extra_args = Vec::new();
             add_optimizer_args(&mut extra_args, args);
             // Same rationale as the MEL path: analyze the container so crop probing can seek.
-            measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args)?;
+            measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args, true)?;
             if measurements_file.is_none() {
                 return Ok(false);
             }
@@ -269,33 +299,88 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
         }
         HdrFormat::Hlg => {
             // HLG Logic
-            current_step += 1;
-            progress::print_step(
-                current_step,
-                total_steps,
-                &format!(
-                    "Generating measurements (HLG, --hlg-peak-nits={})...",
-                    args.hlg_peak_nits
-                ),
-            );
-
             let mut extra_args = vec![
                 "--hlg-peak-nits".to_string(),
                 args.hlg_peak_nits.to_string(),
             ];
             add_optimizer_args(&mut extra_args, args);
 
-            measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args)?;
-            if measurements_file.is_none() {
-                return Ok(false);
-            }
+            // Measuring and the HLG -> PQ encode both only read the source, so a single job
+            // runs them side by side. When several files convert at once, the others already
+            // keep the machine busy, so the steps stay sequential rather than oversubscribing
+            // it. `is_parallel` reflects the effective job count (clamped to the queue).
+            if !progress::is_parallel() {
+                current_step += 2;
+                progress::print_step(
+                    current_step,
+                    total_steps,
+                    &format!(
+                        "Generating measurements and converting HLG to PQ in parallel \
+                         (--hlg-peak-nits={})...",
+                        args.hlg_peak_nits
+                    ),
+                );
+                progress::print_info(
+                    "Analyzer progress is hidden while encoding (output kept in analyzer.log on failure).",
+                );
+
+                // A failed analysis makes the encode useless, so it is cancelled rather than
+                // left to run for hours before the file is reported as failed.
+                let analysis_failed = AtomicBool::new(false);
+                let (analysis, encode) = thread::scope(|scope| {
+                    let analyzer = scope.spawn(|| {
+                        let result =
+                            run_hdr_analyzer(input_file, &temp_dir, &extra_args, args, false);
+                        if !matches!(result, Ok(Some(_))) {
+                            analysis_failed.store(true, Ordering::SeqCst);
+                        }
+                        result
+                    });
+                    let encode = convert_hlg_to_pq(
+                        input_file,
+                        &temp_dir,
+                        args,
+                        resume_enabled,
+                        Some(&analysis_failed),
+                    );
+                    let analysis = analyzer
+                        .join()
+                        .unwrap_or_else(|panic| std::panic::resume_unwind(panic));
+                    (analysis, encode)
+                });
 
-            // Convert HLG -> PQ for Base Layer
-            current_step += 1;
-            progress::print_step(current_step, total_steps, "Converting HLG to PQ...");
-            match convert_hlg_to_pq(input_file, &temp_dir, args, resume_enabled) {
-                Ok(path) => bl_source_file = path,
-                Err(_) => return Ok(false),
+                measurements_file = analysis?;
+                if measurements_file.is_none() {
+                    return Ok(false);
+                }
+                match encode {
+                    Ok(path) => bl_source_file = path,
+                    Err(_) => return Ok(false),
+                }
+            } else {
+                current_step += 1;
+                progress::print_step(
+                    current_step,
+                    total_steps,
+                    &format!(
+                        "Generating measurements (HLG, --hlg-peak-nits={})...",
+                        args.hlg_peak_nits
+                    ),
+                );
+
+                measurements_file =
+                    run_hdr_analyzer(input_file, &temp_dir, &extra_args, args, true)?;
+                if measurements_file.is_none() {
+                    return Ok(false);
+                }
+
+                // Convert HLG -> PQ for Base Layer
+                current_step += 1;
+                progress::print_step(current_step, total_steps, "Converting HLG to PQ...");
+                match convert_hlg_to_pq(input_file, &temp_dir, args, resume_enabled, None) {
+                    Ok(path) => bl_source_file = path,
+                    Err(_) => return Ok(false),
+                }
             }
         }
         HdrFormat::Hdr10WithMeasurements | HdrFormat::Hdr10Unsupported => {
@@ -326,7 +411,8 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
                 } else {
                     add_optimizer_args(&mut extra_args, args);
                 }
-                measurements_file = run_hdr_analyzer(input_file, &temp_dir, &extra_args, args)?;
+                measurements_file =
+                    run_hdr_analyzer(input_file, &temp_dir, &extra_args, args, true)?;
                 if measurements_file.is_none() {
                     return Ok(false);
                 }
@@ -430,7 +516,11 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     // --- Generate RPU ---
     current_step += 1;
     progress::print_step(current_step, total_steps, "Generating Dolby Vision RPU...");
+    // Resolved once for both dovi_tool steps below (generate and inject-rpu).
+    let dovi_tool = dovi_tool_path();
     let rpu_path = generate_rpu(
+        &dovi_tool,
+        &extra_json_path,
         hdr_type,
         &temp_dir,
         args.peak_source,
@@ -449,9 +539,17 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     current_step += 1;
     progress::print_step(current_step, total_steps, "Extracting base layer...");
 
-    // When the BL source is already a raw Annex B HEVC stream in the temp dir (mdfix and FEL
-    // paths), re-extracting it with ffmpeg would just duplicate ~the full video size on disk.
-    let bl_hevc = if bl_source_file.extension().is_some_and(|ext| ext == "hevc") {
+    // A sealed BL_RPU.hevc from a previous run makes the base layer redundant: the inject step
+    // below reuses it, and its temp-dir input was already deleted after injection.
+    let bl_rpu_hevc = temp_dir.join("BL_RPU.hevc");
+    let bl_rpu_reusable = resume_enabled && resume::is_complete(&bl_rpu_hevc);
+
+    // When the BL source is already a raw Annex B HEVC stream in the temp dir (mdfix, FEL and
+    // HLG paths), re-extracting it with ffmpeg would just duplicate ~the full video size on disk.
+    let bl_hevc = if bl_rpu_reusable {
+        progress::print_info("Base layer already injected in a previous run; skipping extraction.");
+        bl_source_file.clone()
+    } else if bl_source_file.extension().is_some_and(|ext| ext == "hevc") {
         progress::print_info("Base layer is already a raw HEVC stream; skipping re-extraction.");
         bl_source_file.clone()
     } else {
@@ -460,12 +558,12 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
         if resume_enabled && resume::is_complete(&bl_hevc) {
             progress::print_info("Reusing extracted base layer from a previous run.");
         } else {
-            let mut ffmpeg_cmd = Command::new("ffmpeg");
+            let mut ffmpeg_cmd = external::tool_command("ffmpeg");
             ffmpeg_cmd.args([
                 "-hide_banner",
                 "-loglevel",
                 "error",
-                "-stats",
+                external::ffmpeg_stats_flag(),
                 "-i",
                 bl_source_file.to_str().unwrap(),
                 "-map",
@@ -478,7 +576,11 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
                 bl_hevc.to_str().unwrap(),
             ]);
 
-            let bl_total = fs::metadata(&bl_source_file).ok().map(|m| m.len());
+            let bl_total = if bl_source_file == input_path {
+                source_len
+            } else {
+                fs::metadata(&bl_source_file).ok().map(|m| m.len())
+            };
             if !run_command_with_progress(
                 &mut ffmpeg_cmd,
                 &temp_dir.join("ffmpeg_extract_bl.log"),
@@ -502,15 +604,10 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
         total_steps,
         "Injecting RPU into base layer...",
     );
-    let bl_rpu_hevc = temp_dir.join("BL_RPU.hevc");
-
-    if resume_enabled && resume::is_complete(&bl_rpu_hevc) {
+    if bl_rpu_reusable {
         progress::print_info("Reusing RPU-injected base layer from a previous run.");
     } else {
-        let dovi_tool_path =
-            external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-        let mut dovi_cmd =
-            Command::new(fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path));
+        let mut dovi_cmd = Command::new(&dovi_tool);
 
         dovi_cmd.args([
             "inject-rpu",
@@ -565,13 +662,12 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
         mkvmerge_cmd.arg(&bl_rpu_hevc);
         mkvmerge_cmd.arg("--no-video").arg(input_file);
 
-        let mux_total = fs::metadata(input_file).ok().map(|m| m.len());
         if !run_command_with_progress(
             &mut mkvmerge_cmd,
             &temp_dir.join("mkvmerge.log"),
             "Muxing final MKV",
             &output_file,
-            mux_total,
+            source_len,
             args.stall_timeout,
         )? {
             return Ok(false);
@@ -623,13 +719,15 @@ pub fn convert_file(input_file: &str, args: &Args) -> Result<bool> {
     if !progress::is_quiet() {
         eprintln!(
             "\n{}",
-            format!(
-                "✓ Done: {} ({})",
-                output_file.file_name().unwrap().to_string_lossy(),
-                elapsed_str
+            progress::for_stderr(
+                format!(
+                    "✓ Done: {} ({})",
+                    output_file.file_name().unwrap().to_string_lossy(),
+                    elapsed_str
+                )
+                .green()
+                .bold()
             )
-            .green()
-            .bold()
         );
     }
     Ok(true)
@@ -651,10 +749,13 @@ fn add_optimizer_args(args_vec: &mut Vec<String>, args: &Args) {
     args_vec.push(args.optimizer_profile.to_string());
 }
 
+/// Absolute path of the dovi_tool on PATH (bare `dovi_tool` when it cannot be resolved).
+fn dovi_tool_path() -> PathBuf {
+    external::canonical_tool_path("dovi_tool")
+}
+
 fn dovi_tool_command() -> Command {
-    let dovi_tool_path =
-        external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-    Command::new(fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path))
+    Command::new(dovi_tool_path())
 }
 
 fn extract_video_hevc(
@@ -662,6 +763,7 @@ fn extract_video_hevc(
     output: &Path,
     temp_dir: &Path,
     message: &str,
+    log_name: &str,
     resume_enabled: bool,
     stall_timeout: u64,
 ) -> Result<()> {
@@ -673,12 +775,12 @@ fn extract_video_hevc(
         return Ok(());
     }
 
-    let mut command = Command::new("ffmpeg");
+    let mut command = external::tool_command("ffmpeg");
     command.args([
         "-hide_banner",
         "-loglevel",
         "error",
-        "-stats",
+        external::ffmpeg_stats_flag(),
         "-i",
         input,
         "-map",
@@ -696,7 +798,7 @@ fn extract_video_hevc(
     let total = fs::metadata(input).ok().map(|metadata| metadata.len());
     if run_command_with_progress(
         &mut command,
-        &temp_dir.join("ffmpeg_extract_dv.log"),
+        &temp_dir.join(log_name),
         message,
         output,
         total,
@@ -770,6 +872,7 @@ fn extract_clean_base_layer(
         &raw_hevc,
         temp_dir,
         message,
+        "ffmpeg_extract_dv.log",
         resume_enabled,
         stall_timeout,
     )?;
@@ -791,6 +894,7 @@ fn convert_mel_to_profile81(
         &raw_hevc,
         temp_dir,
         "Extracting Profile 7 MEL HEVC stream",
+        "ffmpeg_extract_dv.log",
         resume_enabled,
         args.stall_timeout,
     )?;
@@ -890,13 +994,15 @@ fn finish_success(
     if !progress::is_quiet() {
         eprintln!(
             "\n{}",
-            format!(
-                "✓ Done: {} ({})",
-                output_file.file_name().unwrap().to_string_lossy(),
-                progress::format_duration_pub(started_at.elapsed())
+            progress::for_stderr(
+                format!(
+                    "✓ Done: {} ({})",
+                    output_file.file_name().unwrap().to_string_lossy(),
+                    progress::format_duration_pub(started_at.elapsed())
+                )
+                .green()
+                .bold()
             )
-            .green()
-            .bold()
         );
     }
 }
@@ -917,6 +1023,11 @@ fn is_dolby_vision(hdr_type: HdrFormat) -> bool {
 /// A sibling next to this mkvdovi binary wins first, so a stale PATH install
 /// (e.g. an old version without the L1 sidecar) is never silently picked up.
 pub fn analyzer_executable() -> PathBuf {
+    static ANALYZER: OnceLock<PathBuf> = OnceLock::new();
+    ANALYZER.get_or_init(locate_analyzer).clone()
+}
+
+fn locate_analyzer() -> PathBuf {
     const TOOL: &str = "hdr_analyzer_mvp";
     if let Ok(current_exe) = std::env::current_exe() {
         if let Some(sibling) = current_exe.parent().map(|dir| dir.join(TOOL)) {
@@ -929,7 +1040,7 @@ pub fn analyzer_executable() -> PathBuf {
     if local.exists() {
         local.to_path_buf()
     } else {
-        PathBuf::from(TOOL)
+        external::find_tool(TOOL).unwrap_or_else(|| PathBuf::from(TOOL))
     }
 }
 
@@ -965,11 +1076,15 @@ pub fn resolve_auto_settings(args: &mut Args) {
     }
 }
 
+/// Run hdr_analyzer_mvp on `input`. With `show_progress` its own progress bar is shown on the
+/// terminal; otherwise all of its output goes to `analyzer.log`, which keeps it from fighting
+/// another step's progress bar when the two run concurrently.
 fn run_hdr_analyzer(
     input: &str,
     temp_dir: &Path,
     extra_args: &[String],
     args: &Args,
+    show_progress: bool,
 ) -> Result<Option<PathBuf>> {
     let exe = analyzer_executable();
 
@@ -977,33 +1092,68 @@ fn run_hdr_analyzer(
     let stem = Path::new(input).file_stem().unwrap().to_string_lossy();
     let out_path = dir.join(format!("{}_measurements.bin", stem));
 
-    let (downscale, sample_rate) = analysis_quality_args(args.analysis_quality);
+    let (downscale, sample_rate) = analyzer_sampling_args(
+        args.analysis_quality,
+        metadata::get_video_width_from_mediainfo(input),
+        args,
+    );
 
     let mut cmd = Command::new(&exe);
     cmd.arg(input).arg("-o").arg(&out_path);
-    cmd.args(["--downscale", downscale, "--sample-rate", sample_rate]);
+    cmd.arg("--downscale").arg(downscale.to_string());
+    cmd.arg("--sample-rate").arg(sample_rate.to_string());
     cmd.args(extra_args);
 
     if args.hwaccel != HwAccel::None {
         cmd.arg("--hwaccel").arg(args.hwaccel.to_string());
     }
 
-    // Use inherit_stderr so indicatif progress bar works correctly (detects TTY)
-    if external::run_command_inherit_stderr(&mut cmd, &temp_dir.join("analyzer.log"))?
-        && out_path.exists()
-    {
+    let log_path = temp_dir.join("analyzer.log");
+    // Use inherit_stderr so indicatif progress bar works correctly (detects TTY). Parallel
+    // workers capture it instead, since the analyzer's bar would fight the other files'.
+    let success = if show_progress && !progress::is_parallel() {
+        external::run_command_inherit_stderr(&mut cmd, &log_path)?
+    } else {
+        external::run_command(&mut cmd, &log_path)?
+    };
+    if success && out_path.exists() {
         return Ok(Some(out_path));
     }
     Ok(None)
 }
 
-fn analysis_quality_args(quality: AnalysisQuality) -> (&'static str, &'static str) {
+fn analysis_quality_args(quality: AnalysisQuality) -> (u32, u32) {
     match quality {
         // Auto is resolved to a concrete value at startup; map it defensively.
-        AnalysisQuality::Auto | AnalysisQuality::Balanced => ("2", "1"),
-        AnalysisQuality::Fast => ("2", "3"),
-        AnalysisQuality::Accurate => ("1", "1"),
+        AnalysisQuality::Auto | AnalysisQuality::Balanced => (2, 1),
+        AnalysisQuality::Fast => (2, 3),
+        AnalysisQuality::Accurate => (1, 1),
+    }
+}
+
+/// `(downscale, sample_rate)` for the analyzer: the quality preset adapted to the source width,
+/// then any explicit `--analyzer-downscale` / `--analyzer-sample-rate` override.
+///
+/// Half-resolution analysis exists to make UHD affordable; at HD and below it saves little and
+/// only costs precision, so those sources are analyzed at full size. Sources wider than UHD
+/// (e.g. 8K) are analyzed at quarter size. `accurate` always stays at full resolution.
+fn analyzer_sampling_args(
+    quality: AnalysisQuality,
+    source_width: Option<u32>,
+    args: &Args,
+) -> (u32, u32) {
+    let (mut downscale, sample_rate) = analysis_quality_args(quality);
+    if downscale > 1 {
+        match source_width {
+            Some(width) if width <= 1920 => downscale = 1,
+            Some(width) if width > 3840 => downscale = 4,
+            _ => {}
+        }
     }
+    (
+        args.analyzer_downscale.unwrap_or(downscale),
+        args.analyzer_sample_rate.unwrap_or(sample_rate),
+    )
 }
 
 #[derive(Debug, PartialEq)]
@@ -1114,45 +1264,25 @@ fn extract_hdr10plus_metadata(
     stall_secs: u64,
 ) -> Result<Option<PathBuf>> {
     let hevc = temp_dir.join("video.hevc");
-    if resume && resume::is_complete(&hevc) {
-        progress::print_info("Reusing extracted HEVC stream from a previous run.");
-    } else {
-        let mut cmd = Command::new("ffmpeg");
-        cmd.args([
-            "-hide_banner",
-            "-loglevel",
-            "error",
-            "-i",
-            input,
-            "-map",
-            "0:v:0",
-            "-c:v",
-            "copy",
-            "-f",
-            "hevc",
-            "-y",
-            hevc.to_str().unwrap(),
-        ]);
-
-        let total = fs::metadata(input).ok().map(|m| m.len());
-        if !run_command_with_progress(
-            &mut cmd,
-            &temp_dir.join("ffmpeg_extract_hdr10p.log"),
-            "Extracting HEVC stream",
-            &hevc,
-            total,
-            stall_secs,
-        )? {
-            return Ok(None);
-        }
-        resume::mark_done(&hevc)?;
-    }
-
     let json_out = temp_dir.join("hdr10plus_metadata.json");
+    // Checked first: the HEVC stream is deleted once it has been injected as the base layer,
+    // and a resumed run must not extract it again just to re-read metadata it already has.
     if resume && resume::is_complete(&json_out) {
         progress::print_info("Reusing extracted HDR10+ metadata from a previous run.");
         return Ok(Some(json_out));
     }
+
+    // The same Annex B extraction as the other base layers, since this stream doubles as one.
+    extract_video_hevc(
+        input,
+        &hevc,
+        temp_dir,
+        "Extracting HEVC stream",
+        "ffmpeg_extract_hdr10p.log",
+        resume,
+        stall_secs,
+    )?;
+
     let mut tool = Command::new("hdr10plus_tool");
     tool.args([
         "extract",
@@ -1175,9 +1305,21 @@ fn extract_hdr10plus_metadata(
     Ok(None)
 }
 
-fn convert_hlg_to_pq(input: &str, temp_dir: &Path, args: &Args, resume: bool) -> Result<PathBuf> {
-    let out_path = temp_dir.join("HLG_to_PQ.mkv");
-    if resume && resume::is_complete(&out_path) {
+/// Encode the HLG source to a PQ base layer. The encode is abandoned once `cancel` is set.
+fn convert_hlg_to_pq(
+    input: &str,
+    temp_dir: &Path,
+    args: &Args,
+    resume: bool,
+    cancel: Option<&AtomicBool>,
+) -> Result<PathBuf> {
+    // Encode straight to a raw HEVC stream: it becomes the base layer as-is, with no
+    // intermediate MKV to stream-copy back out before RPU injection.
+    let out_path = temp_dir.join("HLG_to_PQ.hevc");
+    // The encode is deleted once injected, so a sealed BL_RPU.hevc also means it is done.
+    if resume
+        && (resume::is_complete(&out_path) || resume::is_complete(&temp_dir.join("BL_RPU.hevc")))
+    {
         progress::print_info("Reusing HLG\u{2192}PQ base layer from a previous run.");
         return Ok(out_path);
     }
@@ -1198,8 +1340,11 @@ fn convert_hlg_to_pq(input: &str, temp_dir: &Path, args: &Args, resume: bool) ->
     );
 
     let x265_params = format!(
-        "colorprim=bt2020:transfer=smpte2084:colormatrix=bt2020nc:master-display={}:max-cll={},{}:hdr-opt=1:repeat-headers=1",
-        master_display, max_cll, max_fall
+        "colorprim=bt2020:transfer=smpte2084:colormatrix=bt2020nc:master-display={}:max-cll={},{}:hdr-opt=1:repeat-headers=1{}",
+        master_display,
+        max_cll,
+        max_fall,
+        external::x265_thread_params(args.ffmpeg_threads)
     );
 
     let npl = args.hlg_peak_nits;
@@ -1208,12 +1353,12 @@ fn convert_hlg_to_pq(input: &str, temp_dir: &Path, args: &Args, resume: bool) ->
         npl
     );
 
-    let mut cmd = Command::new("ffmpeg");
+    let mut cmd = external::tool_command("ffmpeg");
     cmd.args([
         "-hide_banner",
         "-loglevel",
         "error",
-        "-stats",
+        external::ffmpeg_stats_flag(),
         "-i",
         input,
         "-y",
@@ -1299,15 +1444,18 @@ fn convert_hlg_to_pq(input: &str, temp_dir: &Path, args: &Args, resume: bool) ->
         }
     }
 
+    external::apply_ffmpeg_threads(&mut cmd, args.ffmpeg_threads);
+    cmd.args(["-f", "hevc"]);
     cmd.arg(out_path.to_str().unwrap());
 
-    if run_command_with_progress(
+    if external::run_command_with_progress_cancellable(
         &mut cmd,
         &log_path,
         "Converting HLG to PQ (encoding)",
         &out_path,
         None,
         args.stall_timeout,
+        cancel,
     )? && out_path.exists()
     {
         resume::mark_done(&out_path)?;
@@ -1317,6 +1465,8 @@ fn convert_hlg_to_pq(input: &str, temp_dir: &Path, args: &Args, resume: bool) ->
 }
 
 fn generate_rpu(
+    dovi_tool: &Path,
+    extra_json: &Path,
     hdr_type: HdrFormat,
     temp_dir: &Path,
     peak_source: PeakSource,
@@ -1330,13 +1480,7 @@ fn generate_rpu(
         progress::print_info("Reusing generated RPU from a previous run.");
         return Ok(Some(rpu_out));
     }
-    let extra_json = temp_dir.join("extra.json");
-    // Resolve tool path
-    let dovi_tool_path =
-        external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-    let dovi_abs = fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path);
-
-    let mut cmd = Command::new(&dovi_abs);
+    let mut cmd = Command::new(dovi_tool);
     cmd.args([
         "generate",
         "-j",
@@ -1374,14 +1518,50 @@ fn generate_rpu(
 #[cfg(test)]
 mod tests {
     use super::*;
+    use clap::Parser;
     use serde_json::json;
 
     #[test]
     fn analysis_quality_maps_to_analyzer_sampling_args() {
-        assert_eq!(analysis_quality_args(AnalysisQuality::Fast), ("2", "3"));
-        assert_eq!(analysis_quality_args(AnalysisQuality::Balanced), ("2", "1"));
-        assert_eq!(analysis_quality_args(AnalysisQuality::Accurate), ("1", "1"));
-        assert_eq!(analysis_quality_args(AnalysisQuality::Auto), ("2", "1"));
+        assert_eq!(analysis_quality_args(AnalysisQuality::Fast), (2, 3));
+        assert_eq!(analysis_quality_args(AnalysisQuality::Balanced), (2, 1));
+        assert_eq!(analysis_quality_args(AnalysisQuality::Accurate), (1, 1));
+        assert_eq!(analysis_quality_args(AnalysisQuality::Auto), (2, 1));
+    }
+
+    #[test]
+    fn analyzer_sampling_adapts_downscale_to_source_width() {
+        let args = Args::try_parse_from(["mkvdovi"]).unwrap();
+        let balanced = AnalysisQuality::Balanced;
+
+        assert_eq!(analyzer_sampling_args(balanced, Some(1920), &args), (1, 1));
+        assert_eq!(analyzer_sampling_args(balanced, Some(3840), &args), (2, 1));
+        assert_eq!(analyzer_sampling_args(balanced, Some(7680), &args), (4, 1));
+        assert_eq!(analyzer_sampling_args(balanced, None, &args), (2, 1));
+        assert_eq!(
+            analyzer_sampling_args(AnalysisQuality::Accurate, Some(7680), &args),
+            (1, 1)
+        );
+        assert_eq!(
+            analyzer_sampling_args(AnalysisQuality::Fast, Some(1280), &args),
+            (1, 3)
+        );
+    }
+
+    #[test]
+    fn analyzer_sampling_overrides_win() {
+        let args = Args::try_parse_from([
+            "mkvdovi",
+            "--analyzer-downscale",
+            "2",
+            "--analyzer-sample-rate",
+            "4",
+        ])
+        .unwrap();
+        assert_eq!(
+            analyzer_sampling_args(AnalysisQuality::Accurate, Some(1920), &args),
+            (2, 4)
+        );
     }
 
     #[test]
@@ -3,16 +3,25 @@
 //! Provides spinners and progress bars using indicatif, with automatic
 //! TTY detection and verbose mode support.
 
+use std::cell::RefCell;
 use std::io::IsTerminal;
 use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::OnceLock;
 use std::time::Duration;
 
-use indicatif::{ProgressBar, ProgressStyle};
+use colored::ColoredString;
+use indicatif::{ProgressBar, ProgressDrawTarget, ProgressStyle};
 
 // --- Global State ---
 
 static VERBOSE: AtomicBool = AtomicBool::new(false);
 static QUIET: AtomicBool = AtomicBool::new(false);
+static PARALLEL: AtomicBool = AtomicBool::new(false);
+
+thread_local! {
+    /// Prefix identifying the file this worker thread is converting (parallel runs only).
+    static FILE_TAG: RefCell<String> = const { RefCell::new(String::new()) };
+}
 
 /// Set global verbose mode (shows raw command output)
 pub fn set_verbose(v: bool) {
@@ -39,6 +48,78 @@ pub fn is_tty() -> bool {
     std::io::stderr().is_terminal()
 }
 
+/// Set when several files convert at once (`--jobs` > 1). Live bars from concurrent workers
+/// would overwrite each other on the terminal, so they are replaced by tagged status lines.
+pub fn set_parallel(p: bool) {
+    PARALLEL.store(p, Ordering::SeqCst);
+}
+
+/// Check if files are being converted concurrently
+pub fn is_parallel() -> bool {
+    PARALLEL.load(Ordering::SeqCst)
+}
+
+/// Tag every status line printed by the current thread with `label` (e.g. `file 2/5`) while
+/// running in parallel; an empty label clears it.
+pub fn set_file_tag(label: &str) {
+    let tag = if is_parallel() && !label.is_empty() {
+        format!("[{}] ", label)
+    } else {
+        String::new()
+    };
+    FILE_TAG.with(|t| *t.borrow_mut() = tag);
+}
+
+/// The current thread's file tag (`"[file 2/5] "`), or an empty string outside parallel runs.
+pub fn file_tag() -> String {
+    FILE_TAG.with(|t| t.borrow().clone())
+}
+
+/// Whether live progress bars may be drawn: an interactive, non-verbose, non-quiet,
+/// single-job run.
+pub fn bars_enabled() -> bool {
+    is_tty() && !is_verbose() && !is_quiet() && !is_parallel()
+}
+
+/// Draw target for progress bars built outside this module: stderr, or hidden when bars
+/// are disabled for a parallel run.
+pub fn bar_draw_target() -> ProgressDrawTarget {
+    if is_parallel() {
+        ProgressDrawTarget::hidden()
+    } else {
+        ProgressDrawTarget::stderr()
+    }
+}
+
+static STDERR_COLOR: OnceLock<bool> = OnceLock::new();
+
+fn color_forced() -> bool {
+    ["CLICOLOR_FORCE", "FORCE_COLOR"]
+        .iter()
+        .any(|var| std::env::var(var).is_ok_and(|v| !v.is_empty() && v != "0"))
+}
+
+/// Apply `CLICOLOR_FORCE` / `FORCE_COLOR`, which force colours on for every stream. Without
+/// them `colored` decides from stdout, which suits the reports printed there; status lines
+/// for stderr go through `for_stderr`, whose decision is taken here once.
+pub fn init_color() {
+    let forced = color_forced();
+    if forced {
+        colored::control::set_override(true);
+    }
+    let _ = STDERR_COLOR.set(forced || is_tty());
+}
+
+/// Render a status line for stderr. When stderr is not a terminal (a batch piped to a log)
+/// and colours are not forced, the plain text is used, independently of where stdout goes.
+pub fn for_stderr(line: ColoredString) -> String {
+    if *STDERR_COLOR.get_or_init(|| color_forced() || is_tty()) {
+        line.to_string()
+    } else {
+        (*line).to_owned()
+    }
+}
+
 // --- Spinner ---
 
 /// A spinner for long-running operations with elapsed time
@@ -50,7 +131,7 @@ pub struct Spinner {
 impl Spinner {
     /// Create and start a new spinner with the given message
     pub fn new(message: &str) -> Self {
-        let bar = if is_tty() && !is_verbose() && !is_quiet() {
+        let bar = if bars_enabled() {
             let pb = ProgressBar::new_spinner();
             pb.set_style(
                 ProgressStyle::default_spinner()
@@ -62,10 +143,10 @@ impl Spinner {
             pb.enable_steady_tick(Duration::from_millis(100));
             pb
         } else {
-            // Hidden spinner for non-TTY or verbose mode
+            // Hidden spinner for non-TTY, verbose or parallel mode
             let pb = ProgressBar::hidden();
             if !is_quiet() {
-                eprintln!("  {} {}...", "→".to_string(), message);
+                eprintln!("{}  {} {}...", file_tag(), "→".to_string(), message);
             }
             pb
         };
@@ -84,7 +165,7 @@ impl Spinner {
 
     /// Finish with success indicator
     pub fn finish_success(&self) {
-        if is_tty() && !is_verbose() && !is_quiet() {
+        if bars_enabled() {
             self.bar.finish_with_message(format!(
                 "{} {} [{}]",
                 "\u{2713}",
@@ -93,7 +174,8 @@ impl Spinner {
             ));
         } else if !is_quiet() {
             eprintln!(
-                "  {} {} [{}]",
+                "{}  {} {} [{}]",
+                file_tag(),
                 "\u{2713}",
                 self.message,
                 format_duration(self.bar.elapsed())
@@ -109,11 +191,11 @@ impl Spinner {
             self.message.clone()
         };
 
-        if is_tty() && !is_verbose() && !is_quiet() {
+        if bars_enabled() {
             self.bar
                 .finish_with_message(format!("{} {}", "\u{2717}", msg));
         } else if !is_quiet() {
-            eprintln!("  {} {}", "\u{2717}", msg);
+            eprintln!("{}  {} {}", file_tag(), "\u{2717}", msg);
         }
     }
 
@@ -149,7 +231,7 @@ impl ByteProgress {
     /// Create and start a byte progress bar. `total` is an estimate of the final output
     /// size; pass `None` when it cannot be estimated (e.g. a re-encode).
     pub fn new(message: &str, total: Option<u64>) -> Self {
-        let active = is_tty() && !is_verbose() && !is_quiet();
+        let active = bars_enabled();
         let bar = if active {
             let (pb, template) = match total {
                 Some(t) => (
@@ -173,7 +255,7 @@ impl ByteProgress {
         } else {
             let pb = ProgressBar::hidden();
             if !is_quiet() {
-                eprintln!("  {} {}...", "→", message);
+                eprintln!("{}  {} {}...", file_tag(), "→", message);
             }
             pb
         };
@@ -196,7 +278,11 @@ impl ByteProgress {
     }
 
     /// Show (`Some`) or clear (`None`) a stall warning suffix on the bar message.
+    /// A hidden bar (non-TTY, verbose, quiet) never draws its message, so skip formatting it.
     pub fn set_stall(&self, stalled_for: Option<Duration>) {
+        if !self.active {
+            return;
+        }
         match stalled_for {
             Some(d) => self.bar.set_message(format!(
                 "{}  \u{26a0} no progress for {}",
@@ -218,7 +304,7 @@ impl ByteProgress {
         if self.active {
             self.bar.finish_with_message(line);
         } else if !is_quiet() {
-            eprintln!("  {}", line);
+            eprintln!("{}  {}", file_tag(), line);
         }
     }
 
@@ -232,7 +318,7 @@ impl ByteProgress {
             self.bar
                 .finish_with_message(format!("{} {}", "\u{2717}", msg));
         } else if !is_quiet() {
-            eprintln!("  {} {}", "\u{2717}", msg);
+            eprintln!("{}  {} {}", file_tag(), "\u{2717}", msg);
         }
     }
 }
@@ -253,9 +339,14 @@ impl Drop for ByteProgress {
 pub fn print_step(step: u8, total: u8, message: &str) {
     if !is_quiet() {
         if total > 0 {
-            eprintln!("\n{} {}", format!("[{}/{}]", step, total), message);
+            eprintln!(
+                "\n{}{} {}",
+                file_tag(),
+                format!("[{}/{}]", step, total),
+                message
+            );
         } else {
-            eprintln!("\n[{}] {}", step, message);
+            eprintln!("\n{}[{}] {}", file_tag(), step, message);
         }
     }
 }
@@ -263,14 +354,14 @@ pub fn print_step(step: u8, total: u8, message: &str) {
 /// Print an info message
 pub fn print_info(message: &str) {
     if !is_quiet() {
-        eprintln!("  {} {}", "i", message);
+        eprintln!("{}  {} {}", file_tag(), "i", message);
     }
 }
 
 /// Print a warning message
 pub fn print_warn(message: &str) {
     if !is_quiet() {
-        eprintln!("  {} {}", "!", message);
+        eprintln!("{}  {} {}", file_tag(), "!", message);
     }
 }
 
@@ -278,13 +369,13 @@ pub fn print_warn(message: &str) {
 #[allow(dead_code)]
 pub fn print_success(message: &str) {
     if !is_quiet() {
-        eprintln!("{} {}", "\u{2713}", message);
+        eprintln!("{}{} {}", file_tag(), "\u{2713}", message);
     }
 }
 
 /// Print an error message
 pub fn print_error(message: &str) {
-    eprintln!("{} {}", "\u{2717}", message);
+    eprintln!("{}{} {}", file_tag(), "\u{2717}", message);
 }
 
 // --- Helpers ---
@@ -316,6 +407,21 @@ mod tests {
         assert_eq!(format_duration(Duration::from_secs(3665)), "1h1m5s");
     }
 
+    #[test]
+    fn file_tag_is_only_set_for_parallel_runs() {
+        set_parallel(false);
+        set_file_tag("file 2/5");
+        assert_eq!(file_tag(), "");
+
+        set_parallel(true);
+        set_file_tag("file 2/5");
+        assert_eq!(file_tag(), "[file 2/5] ");
+        assert!(!bars_enabled());
+        set_file_tag("");
+        assert_eq!(file_tag(), "");
+        set_parallel(false);
+    }
+
     #[test]
     fn test_verbose_mode() {
         set_verbose(true);
@@ -82,9 +82,7 @@ fn rpu_format_label(format: RpuFormatKind) -> &'static str {
 }
 
 pub fn extract_rpu(input: &str, output: &Path, limit: Option<u32>) -> Result<()> {
-    let dovi_tool_path =
-        external::find_tool("dovi_tool").unwrap_or_else(|| PathBuf::from("dovi_tool"));
-    let dovi_abs = fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path);
+    let dovi_abs = external::canonical_tool_path("dovi_tool");
     let mut cmd = Command::new(dovi_abs);
     cmd.arg("extract-rpu")
         .arg("-i")
@@ -110,10 +108,10 @@ pub fn extract_rpu(input: &str, output: &Path, limit: Option<u32>) -> Result<()>
 
 pub fn try_extract_rpu_quiet(input: &str, output: &Path, limit: Option<u32>) -> bool {
     let _ = fs::remove_file(output);
-    let Some(dovi_tool_path) = external::find_tool("dovi_tool") else {
+    if external::find_tool("dovi_tool").is_none() {
         return false;
-    };
-    let dovi_abs = fs::canonicalize(&dovi_tool_path).unwrap_or(dovi_tool_path);
+    }
+    let dovi_abs = external::canonical_tool_path("dovi_tool");
     let mut cmd = Command::new(dovi_abs);
     cmd.arg("extract-rpu")
         .arg("-i")
@@ -137,7 +135,7 @@ pub fn extract_rpu_sample(input: &str, temp_dir: &Path) -> Result<PathBuf> {
     let sample_hevc = temp_dir.join("dv_probe.hevc");
     let sample_rpu = temp_dir.join("dv_probe_RPU.bin");
 
-    let mut ffmpeg_cmd = Command::new("ffmpeg");
+    let mut ffmpeg_cmd = external::tool_command("ffmpeg");
     ffmpeg_cmd.args([
         "-hide_banner",
         "-loglevel",
@@ -228,7 +226,7 @@ fn extract_rpu_window(
     let sample_hevc = temp_dir.join(format!("dv_window_{idx}.hevc"));
     let sample_rpu = temp_dir.join(format!("dv_window_{idx}_RPU.bin"));
 
-    let mut ffmpeg_cmd = Command::new("ffmpeg");
+    let mut ffmpeg_cmd = external::tool_command("ffmpeg");
     ffmpeg_cmd
         .arg("-hide_banner")
         .arg("-loglevel")
@@ -265,7 +263,7 @@ fn extract_rpu_window(
 }
 
 fn probe_duration_secs(input: &str) -> Option<f64> {
-    let output = Command::new("ffprobe")
+    let output = external::tool_command("ffprobe")
         .args([
             "-v",
             "error",
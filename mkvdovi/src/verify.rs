@@ -1,9 +1,13 @@
 use colored::Colorize;
+use std::fs::File;
+use std::io::Write;
 use std::path::Path;
-use std::process::Command;
+use std::process::{Command, Stdio};
+use std::thread;
 
 use crate::external::{self, run_command};
 use crate::metadata;
+use crate::progress;
 
 #[allow(dead_code)]
 pub fn verify_post_mux(
@@ -16,6 +20,12 @@ pub fn verify_post_mux(
 }
 
 /// Full verification with optional expected CM version for RPU content assertions.
+///
+/// The measurement, RPU and duration checks share no inputs, so they run concurrently and
+/// the total time is that of the slowest (the RPU extraction from the muxed output). Each
+/// check collects its status lines, which are printed in a fixed order once all have
+/// finished, so the report reads the same on every run and stays in one piece under
+/// `--jobs`.
 pub fn verify_post_mux_with_options(
     input_file: &str,
     output_file: &Path,
@@ -23,34 +33,172 @@ pub fn verify_post_mux_with_options(
     temp_dir: &Path,
     expected_cm_version: Option<&str>,
 ) -> bool {
-    let mut ok = true;
-
-    // 1. Run internal verifier on measurements if available.
-    if let Some(meas_path) = measurements {
-        println!("{}", "Verifying measurements...".cyan());
-        if let Some(exe) = external::find_tool("verifier") {
-            let mut cmd = Command::new(exe);
-            cmd.arg(meas_path);
-            if !run_logged_command(&mut cmd, &temp_dir.join("verifier.log")) {
-                println!("{}", "Verifier tool reported issues.".red());
-                ok = false;
-            }
-        } else {
-            println!(
-                "{}",
-                "Verifier binary not found on PATH; skipping measurement check. \
-                 Install with: cargo install --path verifier"
-                    .yellow()
-            );
+    let checks: [(bool, Vec<String>); 3] = thread::scope(|scope| {
+        let measurements_check = scope.spawn(|| {
+            let mut report = Vec::new();
+            let ok = measurements.map_or(true, |meas_path| {
+                verify_measurements(meas_path, temp_dir, &mut report)
+            });
+            (ok, report)
+        });
+        let duration_check = scope.spawn(|| {
+            let mut report = Vec::new();
+            (
+                verify_duration(input_file, output_file, &mut report),
+                report,
+            )
+        });
+        let mut rpu_report = Vec::new();
+        let rpu_ok = verify_rpu(output_file, temp_dir, expected_cm_version, &mut rpu_report);
+
+        // Every check runs to completion so all problems are reported, not just the first.
+        let panicked = || {
+            (
+                false,
+                vec!["Verification check panicked.".red().to_string()],
+            )
+        };
+        [
+            measurements_check.join().unwrap_or_else(|_| panicked()),
+            (rpu_ok, rpu_report),
+            duration_check.join().unwrap_or_else(|_| panicked()),
+        ]
+    });
+
+    // One locked write per report keeps it contiguous among other files' output.
+    let tag = progress::file_tag();
+    let mut stdout = std::io::stdout().lock();
+    for line in checks.iter().flat_map(|(_, report)| report) {
+        let _ = writeln!(stdout, "{}{}", tag, line);
+    }
+    checks.iter().all(|(ok, _)| *ok)
+}
+
+/// 1. Run internal verifier on measurements.
+fn verify_measurements(meas_path: &Path, temp_dir: &Path, report: &mut Vec<String>) -> bool {
+    report.push("Verifying measurements...".cyan().to_string());
+    if let Some(exe) = external::find_tool("verifier") {
+        let mut cmd = Command::new(exe);
+        cmd.arg(meas_path);
+        if !run_logged_command(&mut cmd, &temp_dir.join("verifier.log")) {
+            report.push("Verifier tool reported issues.".red().to_string());
+            return false;
         }
+    } else {
+        report.push(
+            "Verifier binary not found on PATH; skipping measurement check. \
+             Install with: cargo install --path verifier"
+                .yellow()
+                .to_string(),
+        );
     }
+    true
+}
 
-    // 2. Extract RPU from the muxed output for structural inspection.
-    println!("{}", "Checking with dovi_tool info...".cyan());
-    let hevc_path = temp_dir.join("verify_video.hevc");
+/// 2. Extract RPU from the muxed output for structural inspection.
+fn verify_rpu(
+    output_file: &Path,
+    temp_dir: &Path,
+    expected_cm_version: Option<&str>,
+    report: &mut Vec<String>,
+) -> bool {
+    report.push("Checking with dovi_tool info...".cyan().to_string());
     let rpu_path = temp_dir.join("verify_rpu.bin");
 
-    let mut ffmpeg = Command::new("ffmpeg");
+    let _ = std::fs::remove_file(&rpu_path);
+    let extracted = (extract_rpu_piped(output_file, &rpu_path, temp_dir)
+        && rpu_path.metadata().map(|m| m.len() > 0).unwrap_or(false))
+        || extract_rpu_via_file(output_file, &rpu_path, temp_dir);
+    if !extracted {
+        report.push("RPU extraction for verification failed.".red().to_string());
+        return false;
+    }
+
+    thread::scope(|scope| {
+        // The summary is only kept for the log, so it runs beside the frame check.
+        scope.spawn(|| {
+            let mut summary_cmd = external::tool_command("dovi_tool");
+            summary_cmd.args(["info", "--summary", "-i", rpu_path.to_str().unwrap()]);
+            if let Ok(summary) = external::get_command_output(&mut summary_cmd) {
+                let _ = std::fs::write(temp_dir.join("dovi_info_summary.log"), summary);
+            }
+        });
+
+        let mut frame_cmd = external::tool_command("dovi_tool");
+        frame_cmd.args(["info", "--frame", "0", "-i", rpu_path.to_str().unwrap()]);
+        match external::get_command_output(&mut frame_cmd) {
+            Ok(frame_output) => {
+                let _ = std::fs::write(temp_dir.join("dovi_info_frame_0.log"), &frame_output);
+                match parse_dovi_frame_json(&frame_output) {
+                    Ok(frame) => assert_rpu_invariants(&frame, expected_cm_version, report),
+                    Err(e) => {
+                        report.push(
+                            format!("Failed to parse dovi_tool frame JSON: {e}")
+                                .red()
+                                .to_string(),
+                        );
+                        false
+                    }
+                }
+            }
+            Err(e) => {
+                report.push(format!("dovi_tool info failed: {e}").red().to_string());
+                false
+            }
+        }
+    })
+}
+
+/// Stream the muxed video track from ffmpeg straight into `dovi_tool extract-rpu`, so the
+/// full HEVC elementary stream is never written to disk. Returns false on any failure,
+/// including dovi_tool builds that cannot read from stdin.
+fn extract_rpu_piped(output_file: &Path, rpu_path: &Path, temp_dir: &Path) -> bool {
+    let (Ok(ffmpeg_log), Ok(dovi_log)) = (
+        File::create(temp_dir.join("verify_extract_hevc.log")),
+        File::create(temp_dir.join("verify_extract_rpu.log")),
+    ) else {
+        return false;
+    };
+
+    let Ok(mut ffmpeg) = external::tool_command("ffmpeg")
+        .args(["-hide_banner", "-loglevel", "error", "-i"])
+        .arg(output_file)
+        .args(["-map", "0:v:0", "-c:v", "copy", "-f", "hevc", "-"])
+        .stdout(Stdio::piped())
+        .stderr(Stdio::from(ffmpeg_log))
+        .spawn()
+    else {
+        return false;
+    };
+    let Some(hevc) = ffmpeg.stdout.take() else {
+        let _ = ffmpeg.kill();
+        let _ = ffmpeg.wait();
+        return false;
+    };
+
+    let dovi_log_err = dovi_log.try_clone();
+    let dovi = external::tool_command("dovi_tool")
+        .args(["extract-rpu", "-", "-o"])
+        .arg(rpu_path)
+        .stdin(Stdio::from(hevc))
+        .stdout(Stdio::from(dovi_log))
+        .stderr(
+            dovi_log_err
+                .map(Stdio::from)
+                .unwrap_or_else(|_| Stdio::null()),
+        )
+        .status();
+
+    // If dovi_tool exited early, ffmpeg ends on the broken pipe; reap it either way.
+    let ffmpeg_ok = ffmpeg.wait().map(|s| s.success()).unwrap_or(false);
+    ffmpeg_ok && dovi.map(|s| s.success()).unwrap_or(false)
+}
+
+/// Fallback for `extract_rpu_piped`: demux the video track to a temp file, then extract.
+fn extract_rpu_via_file(output_file: &Path, rpu_path: &Path, temp_dir: &Path) -> bool {
+    let hevc_path = temp_dir.join("verify_video.hevc");
+
+    let mut ffmpeg = external::tool_command("ffmpeg");
     ffmpeg.args([
         "-hide_banner",
         "-loglevel",
@@ -67,7 +215,7 @@ pub fn verify_post_mux_with_options(
         hevc_path.to_str().unwrap(),
     ]);
 
-    let mut extract_rpu = Command::new("dovi_tool");
+    let mut extract_rpu = external::tool_command("dovi_tool");
     extract_rpu.args([
         "extract-rpu",
         "-i",
@@ -76,65 +224,32 @@ pub fn verify_post_mux_with_options(
         rpu_path.to_str().unwrap(),
     ]);
 
-    if !run_logged_command(&mut ffmpeg, &temp_dir.join("verify_extract_hevc.log"))
-        || !run_logged_command(&mut extract_rpu, &temp_dir.join("verify_extract_rpu.log"))
-    {
-        println!("{}", "RPU extraction for verification failed.".red());
-        return false;
-    }
-
-    let mut summary_cmd = Command::new("dovi_tool");
-    summary_cmd.args(["info", "--summary", "-i", rpu_path.to_str().unwrap()]);
-    if let Ok(summary) = external::get_command_output(&mut summary_cmd) {
-        let _ = std::fs::write(temp_dir.join("dovi_info_summary.log"), summary);
-    }
-
-    let mut frame_cmd = Command::new("dovi_tool");
-    frame_cmd.args(["info", "--frame", "0", "-i", rpu_path.to_str().unwrap()]);
-    match external::get_command_output(&mut frame_cmd) {
-        Ok(frame_output) => {
-            let _ = std::fs::write(temp_dir.join("dovi_info_frame_0.log"), &frame_output);
-            match parse_dovi_frame_json(&frame_output) {
-                Ok(frame) => {
-                    if !assert_rpu_invariants(&frame, expected_cm_version) {
-                        ok = false;
-                    }
-                }
-                Err(e) => {
-                    println!(
-                        "{}",
-                        format!("Failed to parse dovi_tool frame JSON: {e}").red()
-                    );
-                    ok = false;
-                }
-            }
-        }
-        Err(e) => {
-            println!("{}", format!("dovi_tool info failed: {e}").red());
-            ok = false;
-        }
-    }
+    let ok = run_logged_command(&mut ffmpeg, &temp_dir.join("verify_extract_hevc.log"))
+        && run_logged_command(&mut extract_rpu, &temp_dir.join("verify_extract_rpu.log"));
+    let _ = std::fs::remove_file(&hevc_path);
+    ok
+}
 
-    // 3. Duration consistency check (1-second tolerance).
+/// 3. Duration consistency check (1-second tolerance).
+fn verify_duration(input_file: &str, output_file: &Path, report: &mut Vec<String>) -> bool {
     if let (Some(d_in), Some(d_out)) = (
         metadata::get_duration_from_mediainfo(input_file),
         get_duration_from_file(output_file),
     ) {
         let diff = (d_in - d_out).abs();
         if diff > 1.0 {
-            println!(
-                "{}",
+            report.push(
                 format!(
                     "Duration mismatch! Input: {:.2}s, Output: {:.2}s",
                     d_in, d_out
                 )
                 .red()
+                .to_string(),
             );
-            ok = false;
+            return false;
         }
     }
-
-    ok
+    true
 }
 
 fn parse_dovi_frame_json(output: &str) -> Result<serde_json::Value, String> {
@@ -159,7 +274,11 @@ fn metadata_block<'a>(
 
 /// Assert structural invariants from structured `dovi_tool info --frame 0` JSON.
 /// Returns false if any hard invariant is violated.
-fn assert_rpu_invariants(frame: &serde_json::Value, expected_cm_version: Option<&str>) -> bool {
+fn assert_rpu_invariants(
+    frame: &serde_json::Value,
+    expected_cm_version: Option<&str>,
+    report: &mut Vec<String>,
+) -> bool {
     let mut failures = Vec::new();
 
     if frame
@@ -230,11 +349,11 @@ fn assert_rpu_invariants(frame: &serde_json::Value, expected_cm_version: Option<
     }
 
     for failure in &failures {
-        println!("{}", format!("RPU invariant FAIL: {failure}").red());
+        report.push(format!("RPU invariant FAIL: {failure}").red().to_string());
     }
 
     if failures.is_empty() {
-        println!("{}", "RPU structural invariants passed.".green());
+        report.push("RPU structural invariants passed.".green().to_string());
         true
     } else {
         false
@@ -290,7 +409,11 @@ mod tests {
 
     #[test]
     fn rpu_invariants_accept_valid_v40_frame() {
-        assert!(assert_rpu_invariants(&valid_frame(), Some("V40")));
+        assert!(assert_rpu_invariants(
+            &valid_frame(),
+            Some("V40"),
+            &mut Vec::new()
+        ));
     }
 
     #[test]
@@ -299,7 +422,18 @@ mod tests {
         frame["vdr_dm_data"]["cmv29_metadata"]["ext_metadata_blocks"][0]["Level1"]["avg_pq"] =
             json!(3000);
 
-        assert!(!assert_rpu_invariants(&frame, Some("V40")));
+        assert!(!assert_rpu_invariants(&frame, Some("V40"), &mut Vec::new()));
+    }
+
+    #[test]
+    fn rpu_invariants_collect_failures_into_the_report() {
+        let mut frame = valid_frame();
+        frame["dovi_profile"] = json!(7);
+        let mut report = Vec::new();
+
+        assert!(!assert_rpu_invariants(&frame, None, &mut report));
+        assert_eq!(report.len(), 1);
+        assert!(report[0].contains("expected Dolby Vision profile 8 output"));
     }
 
     #[test]
@@ -307,6 +441,6 @@ mod tests {
         let mut frame = valid_frame();
         frame["vdr_dm_data"]["cmv40_metadata"]["ext_metadata_blocks"] = json!([]);
 
-        assert!(!assert_rpu_invariants(&frame, Some("V40")));
+        assert!(!assert_rpu_invariants(&frame, Some("V40"), &mut Vec::new()));
     }
 }
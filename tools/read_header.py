@@ -1,27 +1,73 @@
+import glob
+import os
 import struct
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# magic, version, header_size, scene_count, frame_count, flags, maxcll
+HEADER = struct.Struct("<4s6I")
+
+
+def read_raw_header(file_path):
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        # Read enough for MaxCLL; pread is one positioned syscall (not available on Windows).
+        if hasattr(os, "pread"):
+            data = os.pread(fd, HEADER.size, 0)
+        else:
+            data = os.read(fd, HEADER.size)
+        # Only the header is ever needed; keep large scans from filling the page cache.
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return data
 
 
 def read_header(file_path):
-    with open(file_path, "rb") as f:
-        data = f.read(28)  # Read enough for MaxCLL
+    try:
+        data = read_raw_header(file_path)
+    except OSError as e:
+        return False, f"{file_path}: {e.strerror}"
 
+    if len(data) < HEADER.size:
+        return False, f"{file_path}: Truncated header: {len(data)} bytes"
     magic = data[0:4]
     if magic != b"mvr+":
-        print(f"Invalid magic: {magic}")
-        return
+        return False, f"{file_path}: Invalid magic: {magic}"
+
+    magic, version, header_size, scene_count, frame_count, flags, maxcll = HEADER.unpack(data)
+
+    return True, "\n".join(
+        [
+            f"File: {file_path}",
+            f"Version: {version}",
+            f"MaxCLL: {maxcll}",
+            f"Flags: {flags}",
+        ]
+    )
+
+
+def main(argv):
+    if not argv:
+        print("Usage: read_header.py <file.measurements|glob>...", file=sys.stderr)
+        return 2
 
-    version = struct.unpack("<I", data[4:8])[0]
-    header_size = struct.unpack("<I", data[8:12])[0]
-    scene_count = struct.unpack("<I", data[12:16])[0]
-    frame_count = struct.unpack("<I", data[16:20])[0]
-    flags = struct.unpack("<I", data[20:24])[0]
-    maxcll = struct.unpack("<I", data[24:28])[0]
+    # Expand patterns here too, for shells (cmd.exe) that pass globs through verbatim.
+    paths = []
+    for arg in argv:
+        paths.extend(sorted(glob.glob(arg)) or [arg])
 
-    print(f"File: {file_path}")
-    print(f"Version: {version}")
-    print(f"MaxCLL: {maxcll}")
-    print(f"Flags: {flags}")
+    # Each file is one tiny independent read, so a season batch fans out across threads.
+    failed = False
+    with ThreadPoolExecutor() as ex:
+        for i, (ok, report) in enumerate(ex.map(read_header, paths)):
+            if i:
+                print()  # Blank line between per-file reports
+            print(report)
+            failed |= not ok
+    return 1 if failed else 0
 
 
-read_header("s01e10.measurements")
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))